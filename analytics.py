@@ -0,0 +1,283 @@
+# analytics.py
+#
+# Capacity reports computed over a columnar copy of the inventory: one flat
+# array of port flags and one of connection ids for every port, plus
+# per-device type, rack and port counts. Counts are taken in whole-array passes
+# (NumPy if it is installed, C-level bytes/array operations otherwise). Each
+# distinct connection target is parsed once; the connection check is then
+# fully vectorized only with NumPy, and without it connection_issues() still
+# loops over every port in Python.
+
+import bisect
+import csv
+import json
+from array import array
+
+from graph import PASS_THROUGH_TYPES, format_endpoint, parse_endpoint
+from models import InternTable, POE, VLAN, UNASSIGNED
+
+try:
+    import numpy as np
+except ImportError:  # Optional; the fallback gives the same results, just slower
+    np = None
+
+# Per-port PoE allocation (802.3af class 3) used for the PoE budget
+POE_PORT_WATTS = 15.4
+# Only this many problem connections are listed; all are counted
+MAX_REPORTED_ISSUES = 1000
+
+# Connection target classes
+OK, EXTERNAL, DANGLING = 0, 1, 2
+
+# byte.translate tables turning a flags byte into 1 if the bit is set, else 0
+_BIT_TABLES = {flag: bytes(1 if value & flag else 0 for value in range(256)) for flag in (POE, VLAN)}
+
+REPORT_COLUMNS = [
+    "group", "name", "devices", "ports", "connected", "free", "utilization",
+    "poe_ports", "poe_watts", "vlan_ports", "vlan_share",
+]
+
+
+class PortColumns:
+    # Columnar snapshot of devices (any iterable, read once)
+    def __init__(self, devices, strings=None):
+        self.strings = strings if strings is not None else InternTable()
+        self.names = []
+        self.types = []
+        self.racks = []
+        self.port_counts = array("I")
+        self.offsets = array("Q", [0])  # First global port number of each device, plus the total
+        flag_chunks = []
+        target_chunks = []
+        intern = self.strings.intern
+        for device in devices:
+            ports = device.ports
+            targets = ports.targets
+            if ports.strings is not self.strings:
+                # Each distinct target is looked up once per device, not once per port
+                lookup = ports.strings.lookup
+                ids = {target_id: intern(lookup(target_id)) for target_id in set(targets)}
+                targets = array("I", map(ids.__getitem__, targets))
+            self.names.append(device.name)
+            self.types.append(device.type)
+            # Rack numbers repeat across sites, so a rack is labelled with its site
+            self.racks.append("-".join(part for part in (device.site, device.rack) if part) or UNASSIGNED)
+            self.port_counts.append(len(ports))
+            self.offsets.append(self.offsets[-1] + len(ports))
+            flag_chunks.append(ports.flags.tobytes())
+            target_chunks.append(targets.tobytes())
+        self.flags = b"".join(flag_chunks)
+        self.targets = array("I")
+        self.targets.frombytes(b"".join(target_chunks))
+
+    def __len__(self):
+        return len(self.names)
+
+    def device_counts(self):
+        # Per-device (connected, poe, vlan) sequences
+        if np is not None:
+            return self._device_counts_numpy()
+        connected, poe, vlan = array("I"), array("I"), array("I")
+        poe_table, vlan_table = _BIT_TABLES[POE], _BIT_TABLES[VLAN]
+        for device_index in range(len(self)):
+            start, end = self.offsets[device_index], self.offsets[device_index + 1]
+            flags = self.flags[start:end]
+            connected.append(end - start - self.targets[start:end].count(0))
+            poe.append(flags.translate(poe_table).count(1))
+            vlan.append(flags.translate(vlan_table).count(1))
+        return connected, poe, vlan
+
+    def _device_counts_numpy(self):
+        device_of_port = np.repeat(np.arange(len(self)), np.frombuffer(self.port_counts, dtype=np.uint32))
+        flags = np.frombuffer(self.flags, dtype=np.uint8)
+        targets = np.frombuffer(self.targets, dtype=np.uint32)
+        counts = []
+        for mask in (targets != 0, (flags & POE) != 0, (flags & VLAN) != 0):
+            counts.append(np.bincount(device_of_port[mask], minlength=len(self)))
+        return counts
+
+    def connection_issues(self):
+        # (dangling, one_sided, conflicting, external) global port lists. A port
+        # is one-sided when its peer port declares nothing, and conflicting when
+        # the peer declares some other port. Peers on pass-through devices are
+        # not checked, since a patch panel port legitimately has two cables.
+        first_index = {}
+        for device_index, name in enumerate(self.names):
+            first_index.setdefault(name, device_index)
+
+        # Classify each distinct target once
+        classes = {}
+        peers = {}
+        for target_id in set(self.targets):
+            if not target_id:
+                continue
+            text = self.strings.lookup(target_id)
+            # Text in the canonical "Device Port N" form skips the regex
+            device, _, number = text.rpartition(" Port ")
+            device_index = first_index.get(device)
+            if device_index is not None and number.isdigit() and int(number) > 0:
+                port_index = int(number) - 1
+            else:
+                device, port_index = parse_endpoint(text)
+                device_index = first_index.get(device)
+            if port_index is None:
+                classes[target_id] = EXTERNAL
+            elif device_index is None or port_index >= self.port_counts[device_index]:
+                classes[target_id] = DANGLING
+            else:
+                classes[target_id] = OK
+                if self.types[device_index] not in PASS_THROUGH_TYPES:
+                    peers[target_id] = self.offsets[device_index] + port_index
+
+        if np is not None:
+            return self._connection_issues_numpy(classes, peers)
+
+        dangling, one_sided, conflicting, external = [], [], [], []
+        targets = self.targets
+        for port, target_id in enumerate(targets):
+            if not target_id:
+                continue
+            target_class = classes[target_id]
+            if target_class == DANGLING:
+                dangling.append(port)
+            elif target_class == EXTERNAL:
+                external.append(port)
+            elif target_id in peers:
+                back = targets[peers[target_id]]
+                if not back:
+                    one_sided.append(port)
+                elif classes[back] != OK or peers.get(back, port) != port:
+                    conflicting.append(port)
+        return dangling, one_sided, conflicting, external
+
+    def _connection_issues_numpy(self, classes, peers):
+        targets = np.frombuffer(self.targets, dtype=np.uint32)
+        size = int(targets.max()) + 1 if len(targets) else 1
+        class_of = np.full(size, OK, dtype=np.int8)
+        peer_of = np.full(size, -1, dtype=np.int64)
+        for target_id, target_class in classes.items():
+            class_of[target_id] = target_class
+        for target_id, peer in peers.items():
+            peer_of[target_id] = peer
+
+        connected = np.nonzero(targets)[0]
+        connected_class = class_of[targets[connected]]
+        dangling = connected[connected_class == DANGLING]
+        external = connected[connected_class == EXTERNAL]
+        checked = connected[peer_of[targets[connected]] >= 0]
+        back = targets[peer_of[targets[checked]]]
+        one_sided = checked[back == 0]
+        declared = checked[back != 0]
+        back = back[back != 0]
+        conflicting = declared[(class_of[back] != OK) | ((peer_of[back] != declared) & (peer_of[back] >= 0))]
+        return [list(map(int, ports)) for ports in (dangling, one_sided, conflicting, external)]
+
+    def describe_port(self, port):
+        # (device name, 1-based port number, connected_to) for a global port number
+        device_index = bisect.bisect_right(self.offsets, port) - 1
+        port_index = port - self.offsets[device_index]
+        return self.names[device_index], port_index + 1, self.strings.lookup(self.targets[port])
+
+
+def _summary(group, name, devices, ports, connected, poe, vlan):
+    return {
+        "group": group,
+        "name": name,
+        "devices": devices,
+        "ports": ports,
+        "connected": connected,
+        "free": ports - connected,
+        "utilization": connected / ports if ports else 0.0,
+        "poe_ports": poe,
+        "poe_watts": round(poe * POE_PORT_WATTS, 1),
+        "vlan_ports": vlan,
+        "vlan_share": vlan / ports if ports else 0.0,
+    }
+
+
+def _grouped(group, keys, port_counts, connected, poe, vlan):
+    totals = {}
+    for key, ports, c, p, v in zip(keys, port_counts, connected, poe, vlan):
+        row = totals.get(key)
+        if row is None:
+            totals[key] = [1, ports, int(c), int(p), int(v)]
+        else:
+            row[0] += 1
+            row[1] += ports
+            row[2] += int(c)
+            row[3] += int(p)
+            row[4] += int(v)
+    return [_summary(group, key, *row) for key, row in sorted(totals.items())]
+
+
+def utilization_report(devices):
+    # Utilization by device type and by rack, totals, and connection problems
+    columns = PortColumns(devices)
+    connected, poe, vlan = columns.device_counts()
+    dangling, one_sided, conflicting, external = columns.connection_issues()
+
+    issues = []
+    for problem, ports in (("dangling", dangling), ("one-sided", one_sided), ("conflicting", conflicting)):
+        for port in ports[:MAX_REPORTED_ISSUES - len(issues)]:
+            name, port_number, connected_to = columns.describe_port(port)
+            issues.append({
+                "endpoint": format_endpoint(name, port_number - 1),
+                "connected_to": connected_to,
+                "problem": problem,
+            })
+
+    total = _summary(
+        "total", "All", len(columns), len(columns.targets),
+        int(sum(connected)), int(sum(poe)), int(sum(vlan)),
+    )
+    return {
+        "by_type": _grouped("type", columns.types, columns.port_counts, connected, poe, vlan),
+        "by_rack": _grouped("rack", columns.racks, columns.port_counts, connected, poe, vlan),
+        "total": total,
+        "connections": {
+            "dangling": len(dangling),
+            "one_sided": len(one_sided),
+            "conflicting": len(conflicting),
+            "external": len(external),
+            "issues": issues,
+        },
+    }
+
+
+def format_report(report, group="by_type"):
+    # Plain-text table for the dialog and the CLI
+    lines = [f"{'Name':<24} {'Ports':>8} {'Used':>8} {'Free':>8} {'Util':>6} {'PoE W':>9} {'VLAN':>6}"]
+    for row in report[group] + [report["total"]]:
+        lines.append(
+            f"{row['name'][:24]:<24} {row['ports']:>8} {row['connected']:>8} {row['free']:>8} "
+            f"{row['utilization']:>6.1%} {row['poe_watts']:>9.1f} {row['vlan_share']:>6.1%}"
+        )
+    connections = report["connections"]
+    lines.append("")
+    lines.append(
+        f"Connections: {connections['dangling']} dangling, {connections['one_sided']} one-sided, "
+        f"{connections['conflicting']} conflicting, {connections['external']} external"
+    )
+    lines.extend(f"  {issue['problem']}: {issue['endpoint']} -> {issue['connected_to']}"
+                 for issue in connections["issues"][:20])
+    return "\n".join(lines)
+
+
+def export_report(path, report):
+    # JSON keeps everything; CSV gets the utilization rows, then the listed connection problems
+    if path.lower().endswith(".json"):
+        with open(path, "w") as file:
+            json.dump(report, file, indent=4)
+        return
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(report["by_type"])
+        writer.writerows(report["by_rack"])
+        writer.writerow(report["total"])
+        issues = report["connections"]["issues"]
+        if issues:
+            writer = csv.writer(csv_file)
+            writer.writerow([])
+            writer.writerow(["Endpoint", "Connected To", "Problem"])
+            writer.writerows([issue["endpoint"], issue["connected_to"], issue["problem"]] for issue in issues)
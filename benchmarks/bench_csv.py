@@ -0,0 +1,78 @@
+# benchmarks/bench_csv.py
+#
+# Measures CSV import and export throughput (rows/s) and peak memory on a
+# million-row file in the exported.csv layout.
+#
+#     python benchmarks/bench_csv.py [rows]
+
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_io import CSV_HEADER, ImportReport, export_csv, iter_import_batches
+
+ROWS = 1_000_000
+PORTS_PER_DEVICE = 48
+
+
+def write_source(path, rows):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(CSV_HEADER)
+        for row in range(rows):
+            device, port = divmod(row, PORTS_PER_DEVICE)
+            writer.writerow([
+                f"SW-{device:06d}",
+                "Switch",
+                port + 1,
+                f"PP-{device:06d} Port {port + 1}" if port % 2 else "",
+                "Yes" if port % 4 == 0 else "No",
+                "Yes" if port % 3 == 0 else "No",
+            ])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.csv")
+        target = os.path.join(directory, "export.csv")
+        write_source(source, rows)
+
+        # Streaming import: batches are dropped as they arrive, so peak memory
+        # shows the importer's own footprint rather than the inventory's.
+        # Memory is measured in a second pass since tracemalloc slows things down.
+        report = ImportReport()
+        start = time.perf_counter()
+        for batch in iter_import_batches(source, report):
+            pass
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        for batch in iter_import_batches(source):
+            pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"import (streaming): {rows / elapsed:>10,.0f} rows/s  peak {peak / 2**20:6.1f} MB")
+
+        start = time.perf_counter()
+        devices = [device for batch in iter_import_batches(source) for device in batch]
+        elapsed = time.perf_counter() - start
+        print(f"import (retained):  {rows / elapsed:>10,.0f} rows/s  {len(devices)} devices")
+
+        start = time.perf_counter()
+        export_csv(target, devices)
+        elapsed = time.perf_counter() - start
+        print(f"export:             {rows / elapsed:>10,.0f} rows/s")
+
+        start = time.perf_counter()
+        export_csv(target, devices, device_types={"Router"})
+        elapsed = time.perf_counter() - start
+        print(f"export (filtered):  {len(devices) / elapsed:>10,.0f} devices/s skipped")
+
+
+if __name__ == "__main__":
+    main()
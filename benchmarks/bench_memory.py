@@ -0,0 +1,69 @@
+# benchmarks/bench_memory.py
+#
+# Compares the memory used by the original per-port dict layout with the
+# slotted Device/PortTable model at 100k+ ports.
+#
+#     python benchmarks/bench_memory.py
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Device, InternTable, PortTable, POE, VLAN
+
+PORT_COUNTS = [120_000, 480_000]
+PORTS_PER_DEVICE = 48
+
+
+def dict_layout(port_count):
+    # The layout InventoryManager.add_device used to build
+    return [
+        {
+            "type": "Switch",
+            "name": f"SW-{n:05d}",
+            "ports": [
+                {"connected_to": f"PP-{n:05d} Port {i + 1}" if i % 2 else None,
+                 "options": {"PoE": i % 4 == 0, "VLAN": i % 3 == 0}}
+                for i in range(PORTS_PER_DEVICE)
+            ],
+        }
+        for n in range(port_count // PORTS_PER_DEVICE)
+    ]
+
+
+def table_layout(port_count):
+    strings = InternTable()
+    devices = []
+    for n in range(port_count // PORTS_PER_DEVICE):
+        device = Device("Switch", f"SW-{n:05d}")
+        device.ports = PortTable(PORTS_PER_DEVICE, strings)
+        for i in range(PORTS_PER_DEVICE):
+            if i % 2:
+                device.ports.set_connected_to(i, f"PP-{n:05d} Port {i + 1}")
+            device.ports.set_flag(i, POE, i % 4 == 0)
+            device.ports.set_flag(i, VLAN, i % 3 == 0)
+        devices.append(device)
+    return devices
+
+
+def measure(build, port_count):
+    tracemalloc.start()
+    devices = build(port_count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del devices
+    return current
+
+
+def main():
+    print(f"{'ports':>8}  {'dicts (MB)':>10}  {'tables (MB)':>11}  {'ratio':>6}")
+    for port_count in PORT_COUNTS:
+        dicts = measure(dict_layout, port_count)
+        tables = measure(table_layout, port_count)
+        print(f"{port_count:>8}  {dicts / 2**20:>10.1f}  {tables / 2**20:>11.1f}  {dicts / tables:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
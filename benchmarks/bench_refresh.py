@@ -0,0 +1,82 @@
+# benchmarks/bench_refresh.py
+#
+# Times a full refresh of the Port Mapping table at 1k, 10k and 100k ports,
+# comparing the old delete-and-reinsert rebuild with the windowed VirtualTable.
+# Needs a display (or a virtual one such as Xvfb):
+#
+#     python benchmarks/bench_refresh.py
+
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Device, VLAN
+from table_view import PortRowModel, VirtualTable, port_mapping_row
+
+PORT_COUNTS = [1_000, 10_000, 100_000]
+PORTS_PER_DEVICE = 48
+
+
+def make_devices(port_count):
+    # Build patch panels until the requested number of ports is reached
+    devices = []
+    for n in range(port_count // PORTS_PER_DEVICE + 1):
+        ports = min(PORTS_PER_DEVICE, port_count - n * PORTS_PER_DEVICE)
+        if ports <= 0:
+            break
+        device = Device("Patch Panel", f"PP-{n:05d}", ports)
+        for i in range(ports):
+            if i % 2:
+                device.ports.set_connected_to(i, f"SW-{n:05d} Port {i + 1}")
+            device.ports.set_flag(i, VLAN, i % 3 == 0)
+        devices.append(device)
+    return devices
+
+
+def legacy_refresh(tree, devices):
+    # The original refresh_port_mapping: clear everything, insert one item per port
+    tree.delete(*tree.get_children())
+    for device in devices:
+        for port_index in range(len(device.ports)):
+            tree.insert("", "end", values=port_mapping_row(device, port_index))
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    root = tk.Tk()
+    root.withdraw()
+    columns = ("Device", "Port", "Connected To", "PoE", "VLAN")
+
+    print(f"{'ports':>8}  {'legacy (s)':>11}  {'virtual (s)':>11}  {'row edit (s)':>12}")
+    for port_count in PORT_COUNTS:
+        devices = make_devices(port_count)
+
+        legacy_tree = ttk.Treeview(root, columns=columns, show="headings")
+        legacy = timed(lambda: legacy_refresh(legacy_tree, devices))
+        legacy_tree.destroy()
+
+        tree = ttk.Treeview(root, columns=columns, show="headings", height=30)
+        view = VirtualTable(tree, PortRowModel(lambda: devices, port_mapping_row))
+        virtual = timed(view.refresh)
+
+        # An in-place edit of one device only redraws that device's visible rows
+        devices[0].ports.set_connected_to(0, "Edited")
+        row_edit = timed(lambda: view.update_device(0))
+        tree.destroy()
+
+        print(f"{port_count:>8}  {legacy:>11.4f}  {virtual:>11.4f}  {row_edit:>12.6f}")
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# benchmarks/bench_search.py
+#
+# Builds a 50k-device search index and times typical search-box queries,
+# including incremental refinement while a term is being typed.
+#
+#     python benchmarks/bench_search.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Device
+from search import SearchIndex, SearchSession
+
+DEVICE_COUNT = 50_000
+PORTS_PER_DEVICE = 24
+FRAME_BUDGET = 1 / 60
+
+
+def make_devices(device_count):
+    types = ["Router", "Switch", "Firewall", "Patch Panel", "UPS"]
+    devices = []
+    for n in range(device_count):
+        device = Device(types[n % len(types)], f"rack{n // 40:04d}-dev{n:05d}", PORTS_PER_DEVICE)
+        for i in range(0, PORTS_PER_DEVICE, 4):
+            device.ports.set_connected_to(i, f"rack{(n + 1) // 40:04d}-dev{n + 1:05d} Port {i + 1}")
+        devices.append(device)
+    return devices
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    devices = make_devices(DEVICE_COUNT)
+    index = SearchIndex()
+    build, _ = timed(index.rebuild, devices)
+    print(f"index build for {DEVICE_COUNT} devices: {build:.3f}s")
+
+    for term in ["dev12345", "rack0042", "switch", "patch panel"]:
+        elapsed, result = timed(index.search, term)
+        status = "ok" if elapsed < FRAME_BUDGET else "OVER FRAME"
+        print(f"search {term!r:>15}: {len(result):>6} hits in {elapsed * 1000:7.3f} ms  [{status}]")
+
+    # Typing "rack0042-dev" one key at a time, as the search box would
+    session = SearchSession(index)
+    term = "rack0042-dev"
+    for length in range(4, len(term) + 1):
+        elapsed, result = timed(session.search, term[:length])
+        print(f"incremental {term[:length]!r:>15}: {len(result):>6} hits in {elapsed * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
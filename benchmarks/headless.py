@@ -0,0 +1,72 @@
+# benchmarks/headless.py
+#
+# Minimal stand-ins for the Tk widgets the views use, so view code can be
+# timed without a display. They do the bookkeeping a Treeview does (items,
+# values, selection) but draw nothing, so timings measure our code, not Tk.
+
+
+class StubTreeview:
+    def __init__(self, height=30):
+        self._height = height
+        self._items = {}  # iid -> values, in insertion order
+        self._selection = ()
+
+    def cget(self, option):
+        return self._height if option == "height" else ""
+
+    def bind(self, sequence, func):
+        pass
+
+    def insert(self, parent, index, iid=None, values=()):
+        iid = iid if iid is not None else f"I{len(self._items):03X}"
+        self._items[iid] = tuple(values)
+        return iid
+
+    def delete(self, *iids):
+        for iid in iids:
+            self._items.pop(iid, None)
+
+    def item(self, iid, values=None):
+        if values is None:
+            return {"values": self._items[iid]}
+        self._items[iid] = tuple(values)
+
+    def get_children(self, item=""):
+        return tuple(self._items)
+
+    def selection(self):
+        return self._selection
+
+    def selection_set(self, *iids):
+        self._selection = iids
+
+    def selection_remove(self, *iids):
+        self._selection = tuple(iid for iid in self._selection if iid not in iids)
+
+
+class StubScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+class StubRoot:
+    # Just enough of Tk's event loop for RefreshScheduler: idle callbacks run on run_idle()
+    def __init__(self):
+        self._idle = {}
+        self._next_id = 0
+
+    def after_idle(self, func):
+        self._next_id += 1
+        self._idle[self._next_id] = func
+        return self._next_id
+
+    def after_cancel(self, job):
+        self._idle.pop(job, None)
+
+    def run_idle(self):
+        pending, self._idle = self._idle, {}
+        for func in pending.values():
+            func()
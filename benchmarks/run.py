@@ -0,0 +1,219 @@
+# benchmarks/run.py
+#
+# Benchmark harness: builds a synthetic inventory, times load/save, CSV
+# export, search, view refresh, connection lookups and the utilization report,
+# writes the results to a JSON file and compares them with a stored baseline.
+# Runs headless; the views are driven through the stubs in headless.py unless
+# --tk is given.
+#
+#     python benchmarks/run.py --save-baseline          # record a baseline
+#     python benchmarks/run.py                          # compare against it
+#     python benchmarks/run.py --sites 4 --racks 100 --strict
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from analytics import utilization_report
+from core import Inventory
+from generator import RACKS_PER_SITE, generate_inventory
+from graph import Endpoint
+from persistence import cache_path
+from refresh import RefreshScheduler
+from search import SearchSession
+from table_view import PortRowModel, VirtualTable, port_mapping_row
+
+from headless import StubRoot, StubScrollbar, StubTreeview
+
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+# A benchmark this many times slower than the baseline is reported as a regression
+REGRESSION_RATIO = 1.25
+LOOKUPS = 1000
+
+
+def best_of(repeat, func, setup=None):
+    # Fastest of repeat runs, in seconds; setup() runs untimed before each one
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def remove_cache(path):
+    # So the next load parses the JSON instead of reading the cache
+    if os.path.exists(cache_path(path)):
+        os.remove(cache_path(path))
+
+
+def make_views(inventory, use_tk):
+    # (root, VirtualTable) over a real Treeview with --tk, otherwise over the stubs
+    model = PortRowModel(lambda: inventory.devices, port_mapping_row)
+    if not use_tk:
+        return StubRoot(), VirtualTable(StubTreeview(), model, StubScrollbar())
+
+    import tkinter as tk
+    from tkinter import ttk
+
+    root = tk.Tk()
+    root.withdraw()
+    root.run_idle = root.update_idletasks
+    tree = ttk.Treeview(root, columns=("Device", "Port", "Connected To", "PoE", "VLAN"), show="headings", height=30)
+    return root, VirtualTable(tree, model, ttk.Scrollbar(root))
+
+
+def run_benchmarks(args):
+    results = {}
+    repeat = args.repeat
+
+    start = time.perf_counter()
+    devices = generate_inventory(args.sites, args.racks, args.seed)
+    results["generate"] = time.perf_counter() - start
+
+    inventory = Inventory()
+    results["index_build"] = best_of(repeat, lambda: inventory.search_index.rebuild(devices))
+    results["graph_build"] = best_of(repeat, lambda: inventory.graph.rebuild(devices))
+    inventory.devices = devices
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "inventory.json")
+        csv_path = os.path.join(directory, "inventory.csv")
+        results["save_json"] = best_of(repeat, lambda: inventory.save_json(json_path))
+        results["save_json_compact"] = best_of(repeat, lambda: inventory.save_json(json_path, compact=True))
+        results["load_json"] = best_of(
+            repeat, lambda: Inventory.from_json(json_path), setup=lambda: remove_cache(json_path)
+        )
+        results["load_json_cached"] = best_of(repeat, lambda: Inventory.from_json(json_path))
+        results["export_csv"] = best_of(repeat, lambda: inventory.export_csv(csv_path))
+
+    terms = ["r001-sw01", "patch panel", "xc01 port", "s01-r"]
+    results["search"] = best_of(repeat, lambda: [inventory.search(term) for term in terms])
+
+    typed = "s01-r001-sw"
+    session = SearchSession(inventory.search_index)
+    results["search_incremental"] = best_of(
+        repeat,
+        lambda: [session.search(typed[:length]) for length in range(4, len(typed) + 1)],
+        setup=session.reset,
+    )
+
+    root, view = make_views(inventory, args.tk)
+    results["refresh_full"] = best_of(repeat, view.refresh)
+    scheduler = RefreshScheduler(root, [view])
+    target = len(devices) // 2
+
+    def edit_and_redraw():
+        # Ten edits to one device between frames; the scheduler should redraw once
+        for port_index in range(10):
+            inventory.set_port_connection(target, port_index, f"Edited {port_index}")
+            scheduler.invalidate_device(target, [port_index])
+        root.run_idle()
+
+    results["refresh_row_edit"] = best_of(repeat, edit_and_redraw)
+
+    rng = random.Random(args.seed)
+    endpoints = []
+    for _ in range(LOOKUPS):
+        device = devices[rng.randrange(len(devices))]
+        endpoints.append(Endpoint(device.name, rng.randrange(len(device.ports))))
+    results["connection_peer"] = best_of(
+        repeat, lambda: [inventory.graph.peer(device, port) for device, port in endpoints]
+    )
+    results["connection_trace"] = best_of(repeat, lambda: [inventory.graph.trace(endpoint) for endpoint in endpoints])
+
+    results["utilization_report"] = best_of(repeat, lambda: utilization_report(devices))
+
+    scale = {
+        "sites": args.sites,
+        "racks_per_site": args.racks,
+        "seed": args.seed,
+        "devices": len(devices),
+        "ports": inventory.port_count(),
+    }
+    return scale, results
+
+
+def compare(results, baseline, threshold):
+    # Print a comparison table; returns the names of regressed benchmarks
+    regressions = []
+    print(f"{'benchmark':<20} {'ms':>10} {'baseline':>10} {'ratio':>7}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<20} {seconds * 1000:>10.3f} {'-':>10} {'-':>7}")
+            continue
+        ratio = seconds / base if base else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<20} {seconds * 1000:>10.3f} {base * 1000:>10.3f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(data, file, indent=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pyRack benchmark suite")
+    parser.add_argument("--sites", type=int, default=2)
+    parser.add_argument("--racks", type=int, default=RACKS_PER_SITE * 10, help="racks per site")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is kept")
+    parser.add_argument("--tk", action="store_true", help="time the views on real Tk widgets (needs a display)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 on any regression")
+    args = parser.parse_args(argv)
+
+    scale, results = run_benchmarks(args)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "widgets": "tk" if args.tk else "stub",
+        "scale": scale,
+        "results": results,
+    }
+    write_json(args.output, report)
+    print(f"{scale['devices']} devices, {scale['ports']} ports; results written to {args.output}")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        if stored.get("scale") != scale or stored.get("widgets") != report["widgets"]:
+            print(f"Baseline {args.baseline} was recorded at a different scale; not comparing.")
+        else:
+            baseline = stored["results"]
+
+    regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1 if args.strict else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
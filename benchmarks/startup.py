@@ -0,0 +1,115 @@
+# benchmarks/startup.py
+#
+# Time to first window: starts the GUI (python main.py, or a frozen build with
+# --exe) with PYRACK_STARTUP_PROBE set, which makes it write how long it took
+# to map its main window and then quit. Each launch gets an empty autosave
+# directory, so no recovery prompt gets in the way. Needs a display.
+#
+#     python benchmarks/startup.py --save-baseline
+#     python benchmarks/startup.py --exe dist/pyrack/pyrack.exe --strict
+#
+# "wall" is from spawning the process to the probe file appearing, so it
+# includes interpreter start-up and, for onefile builds, unpacking; "app" is
+# measured inside main.py from before its first import.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from run import REGRESSION_RATIO, compare, write_json
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(os.path.dirname(BENCHMARK_DIR), "main.py")
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, "results", "startup.json")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "startup_baseline.json")
+# Seconds to wait for one launch before giving up
+LAUNCH_TIMEOUT = 60
+
+
+def launch_once(command):
+    # (wall seconds, in-app seconds) for one launch
+    with tempfile.TemporaryDirectory() as directory:
+        probe_path = os.path.join(directory, "probe.json")
+        env = dict(os.environ, PYRACK_STARTUP_PROBE=probe_path, PYRACK_AUTOSAVE_DIR=directory)
+        start = time.perf_counter()
+        process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        while not os.path.exists(probe_path):
+            if process.poll() is not None or time.perf_counter() - start > LAUNCH_TIMEOUT:
+                process.kill()
+                error = process.stderr.read().decode(errors="replace").strip()
+                raise RuntimeError(f"{' '.join(command)} exited before showing a window: {error or 'no output'}")
+            time.sleep(0.002)
+        wall = time.perf_counter() - start
+        process.wait(LAUNCH_TIMEOUT)
+        process.stderr.close()
+        with open(probe_path) as file:
+            app = json.load(file)["first_window_ms"] / 1000
+    return wall, app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure pyRack's time to first window")
+    parser.add_argument("--exe", help="frozen build to launch (default: this Python running main.py)")
+    parser.add_argument("--runs", type=int, default=5, help="launches; the first is a warm-up and not counted")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="also store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 on a regression")
+    args = parser.parse_args(argv)
+
+    command = [args.exe] if args.exe else [sys.executable, MAIN_SCRIPT]
+    try:
+        launch_once(command)  # Warm-up: fills the OS file cache
+        launches = [launch_once(command) for _ in range(max(1, args.runs - 1))]
+    except RuntimeError as error:
+        print(f"startup: {error}", file=sys.stderr)
+        return 2
+
+    walls = [wall for wall, _ in launches]
+    apps = [app for _, app in launches]
+    results = {
+        "first_window_wall": statistics.median(walls),
+        "first_window_wall_min": min(walls),
+        "first_window_app": statistics.median(apps),
+    }
+    target = os.path.basename(args.exe) if args.exe else "main.py"
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "target": target,
+        "launches": len(launches),
+        "results": results,
+    }
+    write_json(args.output, report)
+    print(f"{len(launches)} launches of {target}; results written to {args.output}")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            stored = json.load(file)
+        if stored.get("target") != target:
+            print(f"Baseline {args.baseline} was recorded for {stored.get('target')}; not comparing.")
+        else:
+            baseline = stored["results"]
+
+    regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1 if args.strict else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+# core.py
+#
+# Headless inventory operations: devices, ports, persistence, search and
+# export. Nothing here imports tkinter, so it can be scripted, batched and
+# benchmarked without a display; inventory.py and pyrack.py are clients.
+#
+# The storage and CSV backends (persistence, shards, sqlite_store, csv_io) are
+# imported by the methods that use them, so starting with an empty inventory
+# doesn't load json, csv, sqlite3 and their dependencies.
+
+from contextlib import nullcontext
+
+from graph import ConnectionGraph, format_endpoint, parse_endpoint
+from models import Device, InternTable, POE, VLAN, SFP, location
+from search import SearchIndex
+
+# Define supported device types and default ports
+DEVICE_TYPES = {
+    "Router": 4,
+    "Switch": 24,
+    "Firewall": 2,
+    "Patch Panel": 48,
+    "Cross Connect": 48,
+    "UPS": 2,
+}
+
+# File extensions opened through the SQLite backend rather than as JSON
+DATABASE_EXTENSIONS = (".db", ".sqlite")
+
+
+def is_database_path(path):
+    return path.lower().endswith(DATABASE_EXTENSIONS)
+
+
+class Inventory:
+    # The device list plus the structures kept in sync with it: the search
+    # index, the connection graph and, optionally, a SQLite store.
+    def __init__(self):
+        self.devices = []
+        self.strings = InternTable()  # Connection strings of this inventory's devices; see add_devices()
+        self.search_index = SearchIndex()
+        self.graph = ConnectionGraph()
+        self.store = None  # Active SQLiteStore, if the inventory came from or was saved to a database
+        self.journal = None  # journal.Journal recording every edit, when autosave is on
+        self.history = None  # history.History for undo/redo of port edits, when enabled
+
+    # Loading. These build a complete new Inventory so they can run on a worker
+    # thread; adopt() then swaps it in.
+
+    @classmethod
+    def from_json(cls, path, progress=None, cache=True):
+        from persistence import load_devices
+        inventory = cls()
+        inventory.devices = load_devices(path, progress=progress, cache=cache, strings=inventory.strings)
+        inventory.search_index.rebuild(inventory.devices)
+        inventory.graph.rebuild(inventory.devices)
+        return inventory
+
+    @classmethod
+    def from_store(cls, path):
+        # Devices are read a page at a time as they are accessed
+        from sqlite_store import LazyDeviceList, SQLiteStore
+        inventory = cls()
+        inventory.store = SQLiteStore(path)
+        inventory.devices = LazyDeviceList(inventory.store, strings=inventory.strings)
+        inventory.search_index.rebuild_from_texts(inventory.store.search_texts())
+        inventory.graph.rebuild_from_rows(inventory.store.device_types(), inventory.store.iter_connections())
+        return inventory
+
+    @classmethod
+    def from_shards(cls, path):
+        # Only the manifest is read; each rack's shard is loaded when first accessed
+        from shards import ShardedDeviceList
+        inventory = cls()
+        inventory.devices = ShardedDeviceList(path, strings=inventory.strings)
+        inventory.search_index.rebuild_from_texts(inventory.devices.search_texts())
+        inventory.graph.rebuild_from_rows(inventory.devices.device_types(), inventory.devices.iter_connections())
+        return inventory
+
+    @classmethod
+    def open(cls, path, progress=None):
+        from shards import is_sharded_path
+        if is_database_path(path):
+            return cls.from_store(path)
+        if is_sharded_path(path):
+            return cls.from_shards(path)
+        return cls.from_json(path, progress)
+
+    def adopt(self, other):
+        # Take over another Inventory's contents, keeping this object's index and graph identities
+        if self.store is not None and self.store is not other.store:
+            self.store.close()
+        self.devices = other.devices
+        self.strings = other.strings  # The old table goes with the old devices
+        self.store = other.store
+        self.search_index.adopt(other.search_index)
+        self.graph.adopt(other.graph)
+        if self.history is not None:
+            self.history.clear()  # Its device and port positions belong to the old contents
+
+    # Saving. devices defaults to the current list; pass a snapshot when saving
+    # from a worker while the caller keeps editing.
+
+    def save_json(self, path, compact=False, progress=None, devices=None):
+        from persistence import save_devices
+        devices = self.devices if devices is None else devices
+        save_devices(path, devices, compact=compact, progress=progress, total=len(devices))
+
+    def save_store(self, progress=None):
+        # Write only the rows that changed to the active store; returns the rows written
+        from sqlite_store import LazyDeviceList
+        if isinstance(self.devices, LazyDeviceList):
+            return self.devices.save(progress=progress)
+        return self.store.save(list(self.devices), progress=progress)
+
+    @staticmethod
+    def write_store(path, devices, progress=None):
+        # Write devices to a new (or emptied) SQLite database and return the store
+        from sqlite_store import SQLiteStore
+        store = SQLiteStore(path)
+        store.clear()
+        for device in devices:
+            device.store_id = None  # Every device is new to this database
+        store.save(devices, progress=progress)
+        return store
+
+    def attach_store(self, store, devices):
+        # Switch to store, which devices (a snapshot of the current list) was just
+        # written to. The old store, if any, is closed last.
+        previous = self.store
+        self.devices = self._catch_up(devices)
+        self.store = store
+        if previous is not None and previous is not store:
+            previous.close()
+
+    def _catch_up(self, devices):
+        # devices is a snapshot of the current list, taken (perhaps on a worker)
+        # before it was written somewhere new. Devices appended since are added
+        # to it, and any the UI loaded from a lazy list meanwhile (and may have
+        # edited) take the place of the snapshot's copies and their store ids.
+        current = self.devices
+        if not isinstance(current, list):  # A LazyDeviceList or ShardedDeviceList
+            for position, device in current.loaded():
+                if position < len(devices) and devices[position] is not device:
+                    device.store_id = devices[position].store_id
+                    devices[position] = device
+        devices.extend(current[position] for position in range(len(devices), len(current)))
+        return devices
+
+    def save_shards(self, path, progress=None):
+        # Incremental when the inventory is already this sharded inventory; a full write otherwise
+        from shards import ShardedDeviceList, write_shards
+        if isinstance(self.devices, ShardedDeviceList) and self.devices.path == path:
+            return self.devices.save(progress)
+        if isinstance(self.devices, list):
+            write_shards(path, self.devices, progress)
+            self.attach_shards(path, self.devices)
+        else:
+            write_shards(path, self.devices, progress, total=len(self.devices))  # Stays on its current backend
+
+    def attach_shards(self, path, devices, states=None):
+        # Switch to the sharded inventory at path, which devices (a snapshot of
+        # the current list) was just written to; states, from shards.device_states()
+        # taken before writing, lets edits made during the write count as unsaved.
+        # A database, if open, is closed.
+        from shards import ShardedDeviceList
+        self.devices = ShardedDeviceList(path, preload=self._catch_up(devices), preload_states=states,
+                                         strings=self.strings)
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def save(self, path, compact=False, progress=None):
+        # Save to JSON, to a sharded inventory for *.manifest.json, or to a database for .db/.sqlite
+        from shards import is_sharded_path
+        if is_sharded_path(path):
+            self.save_shards(path, progress)
+        elif not is_database_path(path):
+            self.save_json(path, compact, progress)
+        elif self.store is not None and self.store.path == path:
+            self.save_store(progress)
+        else:
+            devices = list(self.devices)
+            self.attach_store(self.write_store(path, devices, progress), devices)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    # Import and export
+
+    def export_csv(self, path, device_types=None, progress=None, devices=None):
+        from csv_io import export_csv
+        devices = self.devices if devices is None else devices
+        export_csv(path, devices, progress=progress, total=len(devices), device_types=device_types)
+
+    @staticmethod
+    def read_csv(path, report=None, progress=None):
+        from csv_io import import_csv
+        return import_csv(path, report, progress)
+
+    # Devices and ports
+
+    def add_device(self, device_type, name, port_count=None, site=None, rack=None):
+        # Raises ValueError for unknown types, empty names or names already taken
+        if device_type not in DEVICE_TYPES:
+            raise ValueError(f"Unknown device type {device_type!r}; expected one of {', '.join(DEVICE_TYPES)}")
+        if not name:
+            raise ValueError("Device name cannot be empty.")
+        if self.find_device(name) is not None:
+            raise ValueError(f"Device already exists: {name}")
+        port_count = DEVICE_TYPES[device_type] if port_count is None else port_count
+        device = Device(device_type, name, port_count, site or None, rack or None, self.strings)
+        self.add_devices([device])
+        return device
+
+    def add_devices(self, devices):
+        # Any number of devices costs one search index update. Devices built
+        # elsewhere (a CSV, a template, a journal) move their connection strings
+        # into this inventory's table.
+        first = len(self.devices)
+        added = []
+        for device in devices:
+            device.ports.use_strings(self.strings)
+            self.devices.append(device)
+            self.graph.add_device(device)
+            if self.journal is not None:
+                self.journal.append({"op": "add_device", "device": device.to_dict()})
+            added.append(device)
+        self.search_index.extend(first, added)
+        return added
+
+    def import_devices(self, devices, report):
+        # Add devices read from a CSV, skipping any whose name the inventory
+        # already has; they are listed in the csv_io.ImportReport instead
+        new = []
+        for device in devices:
+            if self.graph.has_device(device.name):
+                report.skip_existing(device.name)
+            else:
+                new.append(device)
+        return self.add_devices(new)
+
+    def provision(self, template, count, start=1, site=None, rack=None):
+        # Build count devices from a templates.DeviceTemplate and add them in one
+        # batch; raises ValueError if any of the names is already taken
+        devices = template.build(count, start, site or None, rack or None)
+        taken = [device.name for device in devices if self.find_device(device.name) is not None]
+        if taken:
+            more = f" and {len(taken) - 3} more" if len(taken) > 3 else ""
+            raise ValueError(f"Devices already exist: {', '.join(taken[:3])}{more}")
+        return self.add_devices(devices)
+
+    def set_location(self, device_index, site, rack):
+        # Move a device to a site and rack; empty values clear them
+        device = self.devices[device_index]
+        device.site = site or None
+        device.rack = rack or None
+        if self.journal is not None:
+            self.journal.append({"op": "set_location", "device": device_index, "site": device.site, "rack": device.rack})
+
+    def set_port_connection(self, device_index, port_index, connected_to):
+        ports = self.devices[device_index].ports
+        self.set_ports(device_index, {port_index: (connected_to, ports.flags[port_index])})
+
+    def set_port_options(self, device_index, port_index, poe=None, vlan=None, sfp=None):
+        # None leaves an option unchanged
+        ports = self.devices[device_index].ports
+        flags = ports.flags[port_index]
+        for flag, enabled in ((POE, poe), (VLAN, vlan), (SFP, sfp)):
+            if enabled is not None:
+                flags = flags | flag if enabled else flags & ~flag
+        self.set_ports(device_index, {port_index: (ports.connected_to(port_index), flags)})
+
+    def set_ports(self, device_index, changes, label=None):
+        # Set {port_index: (connected_to, flags)} on one device as a single undo step
+        device = self.devices[device_index]
+        ports = device.ports
+        if label is None:
+            label = format_endpoint(device.name, next(iter(changes))) if len(changes) == 1 else device.name
+        with self.edit_group(f"Edit {label}"):
+            for port_index, (connected_to, flags) in changes.items():
+                before = (ports.connected_to(port_index), ports.flags[port_index])
+                ports.set_connected_to(port_index, connected_to)
+                ports.flags[port_index] = flags
+                if self.history is not None:
+                    self.history.record(device_index, port_index, before, (ports.connected_to(port_index), flags))
+                self.graph.set_port(device.name, port_index, ports.connected_to(port_index))
+                self._record_port(device_index, port_index)
+        self.search_index.update(device_index, device)
+
+    def edit_group(self, label):
+        # Context in which every port edit is undone together, e.g. both ends of a cable
+        return self.history.group(label) if self.history is not None else nullcontext()
+
+    def undo(self):
+        # Revert the latest edit; returns {device_index: [port indices]} it touched, or None
+        edit = self.history.undo() if self.history is not None else None
+        return self._restore(edit.states(after=False)) if edit is not None else None
+
+    def redo(self):
+        edit = self.history.redo() if self.history is not None else None
+        return self._restore(edit.states(after=True)) if edit is not None else None
+
+    def _restore(self, states):
+        with self.history.paused():
+            for device_index, changes in states.items():
+                self.set_ports(device_index, changes)
+        return {device_index: list(changes) for device_index, changes in states.items()}
+
+    def ports_changed(self, device_index, port_indices):
+        # Resync the graph and index after ports were edited in place on the Device
+        device = self.devices[device_index]
+        for port_index in port_indices:
+            self.graph.set_port(device.name, port_index, device.ports.connected_to(port_index))
+            self._record_port(device_index, port_index)
+        self.search_index.update(device_index, device)
+
+    def _record_port(self, device_index, port_index):
+        # Journal a port's full state, so replaying the entry twice is harmless
+        if self.journal is not None:
+            ports = self.devices[device_index].ports
+            self.journal.append({
+                "op": "set_port",
+                "device": device_index,
+                "port": port_index,
+                "connected_to": ports.connected_to(port_index),
+                "flags": ports.flags[port_index],
+            })
+
+    # Queries
+
+    def list_devices(self):
+        return [(device.name, device.type) for device in self.devices]
+
+    def search(self, term):
+        # Indices of devices whose name, type or connections contain term
+        return self.search_index.search(term)
+
+    def find_device(self, name):
+        # Index of the first device with this name, or None
+        for device_index in self.search_index.search(name):
+            if self.devices[device_index].name == name:
+                return device_index
+        return None
+
+    def trace(self, text):
+        # End-to-end path for "Device Port N" (or any connected_to form)
+        return self.graph.trace(parse_endpoint(text))
+
+    def port_count(self):
+        return sum(len(device.ports) for device in self.devices)
+
+    def hierarchy(self):
+        # [(site, [(rack, [device indices])])] from each device's site and rack
+        devices = self.devices
+        if hasattr(devices, "hierarchy"):  # Sharded or database-backed: without loading every device
+            return devices.hierarchy()
+        sites = {}
+        for device_index, device in enumerate(devices):
+            site, rack = location(device)
+            sites.setdefault(site, {}).setdefault(rack, []).append(device_index)
+        return [(site, list(racks.items())) for site, racks in sites.items()]
@@ -0,0 +1,203 @@
+# csv_io.py
+
+import csv
+import os
+
+from core import DEVICE_TYPES
+from models import Device, InternTable, POE, VLAN
+
+CSV_HEADER = ["Device Name", "Device Type", "Port Number", "Connected To", "PoE", "VLAN"]
+# Written after CSV_HEADER; optional on import, for files from older exports
+LOCATION_COLUMNS = ["Site", "Rack"]
+
+# Devices handed back per batch by the importer
+IMPORT_BATCH_SIZE = 1000
+# Only the first bad rows are kept in the report; the rest are just counted
+MAX_REPORTED_ERRORS = 100
+# Write buffer for the exporter
+EXPORT_BUFFER_SIZE = 1 << 20
+
+YES_VALUES = {"yes", "y", "true", "1"}
+NO_VALUES = {"no", "n", "false", "0", ""}
+
+
+class ImportReport:
+    # Running totals for an import; bad rows are skipped and recorded here
+    def __init__(self):
+        self.rows = 0
+        self.devices = 0
+        self.skipped = 0
+        self.errors = []  # (line number, message), first MAX_REPORTED_ERRORS only
+        self.existing = []  # Names of devices not added because the inventory already has them
+
+    def reject(self, line_number, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def skip_existing(self, name):
+        self.devices -= 1
+        self.existing.append(name)
+
+    def summary(self):
+        text = f"Imported {self.devices} devices from {self.rows - self.skipped} rows."
+        if self.skipped:
+            text += f"\nSkipped {self.skipped} bad rows:"
+            text += "".join(f"\n  line {line}: {message}" for line, message in self.errors[:10])
+            if self.skipped > 10:
+                text += "\n  ..."
+        if self.existing:
+            more = f" and {len(self.existing) - 3} more" if len(self.existing) > 3 else ""
+            text += f"\nSkipped {len(self.existing)} devices that already exist: {', '.join(self.existing[:3])}{more}"
+        return text
+
+
+def _parse_flag(value):
+    value = value.strip().lower()
+    if value in YES_VALUES:
+        return True
+    if value in NO_VALUES:
+        return False
+    raise ValueError(f"expected Yes or No, got {value!r}")
+
+
+def _build_device(strings, name, device_type, ports, site=None, rack=None):
+    # ports: {port index: (connected_to, flags)}; gaps in the numbering become empty ports
+    device = Device(device_type, name, max(ports) + 1, site or None, rack or None, strings)
+    table = device.ports
+    for port_index, (connected_to, flags) in ports.items():
+        if connected_to:
+            table.set_connected_to(port_index, connected_to)
+        table.flags[port_index] = flags
+    return device
+
+
+def iter_import_batches(path, report=None, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    # Stream a CSV in the export layout (see CSV_HEADER), yielding lists of
+    # Devices. A device's rows must be consecutive and agree on its type; rows
+    # of a name seen earlier in the file are rejected rather than becoming a
+    # second device of that name. The site and rack, when the file has those
+    # columns, come from a device's first row. Bad rows are recorded in report
+    # and skipped without stopping the import.
+    report = report if report is not None else ImportReport()
+    strings = InternTable()  # Shared by every device of this import
+    total = os.path.getsize(path) or 1
+    batch = []
+    current_key = None
+    current_ports = {}
+    current_location = (None, None)
+    first_lines = {}  # Device name -> line its rows started on
+
+    consumed = [0]  # Characters read so far, for progress
+
+    def counted(lines):
+        for line in lines:
+            consumed[0] += len(line)
+            yield line
+
+    with open(path, newline="", encoding="utf-8-sig") as csv_file:
+        reader = csv.reader(counted(csv_file))
+        header = next(reader, None)
+        if header is None:
+            return
+        if [column.strip() for column in header[:len(CSV_HEADER)]] != CSV_HEADER:
+            raise ValueError(f"{path}: expected columns {', '.join(CSV_HEADER)}")
+        columns = CSV_HEADER + LOCATION_COLUMNS
+        has_location = [column.strip() for column in header[:len(columns)]] == columns
+
+        for row in reader:
+            report.rows += 1
+            line_number = reader.line_num
+            if len(row) < len(CSV_HEADER):
+                if any(field.strip() for field in row):
+                    report.reject(line_number, f"expected {len(CSV_HEADER)} columns, got {len(row)}")
+                else:
+                    report.rows -= 1  # Blank line
+                continue
+
+            name, device_type, port_number, connected_to, poe, vlan = (field.strip() for field in row[:6])
+            try:
+                if not name or not device_type:
+                    raise ValueError("device name and type are required")
+                if device_type not in DEVICE_TYPES:
+                    raise ValueError(f"unknown device type {device_type!r}")
+                if not port_number.isdigit() or int(port_number) < 1:
+                    raise ValueError(f"invalid port number {port_number!r}")
+                flags = (POE if _parse_flag(poe) else 0) | (VLAN if _parse_flag(vlan) else 0)
+            except ValueError as error:
+                report.reject(line_number, str(error))
+                continue
+
+            key = (name, device_type)
+            if key != current_key:
+                if current_key is not None and name == current_key[0]:
+                    report.reject(line_number, f"type {device_type!r} differs from the earlier rows for {name}")
+                    continue
+                if name in first_lines:
+                    report.reject(line_number, f"rows for {name} must be next to each other "
+                                               f"(its first rows start on line {first_lines[name]})")
+                    continue
+                if current_ports:
+                    batch.append(_build_device(strings, *current_key, current_ports, *current_location))
+                    report.devices += 1
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                        if progress is not None:
+                            progress(min(consumed[0] / total, 1.0))
+                current_key = key
+                current_ports = {}
+                current_location = tuple(field.strip() for field in row[6:8]) if has_location else (None, None)
+                first_lines[name] = line_number
+
+            port_index = int(port_number) - 1
+            if port_index in current_ports:
+                report.reject(line_number, f"duplicate port {port_number} for {name}")
+                continue
+            current_ports[port_index] = (connected_to, flags)
+
+    if current_ports:
+        batch.append(_build_device(strings, *current_key, current_ports, *current_location))
+        report.devices += 1
+    if batch:
+        yield batch
+    if progress is not None:
+        progress(1.0)
+
+
+def import_csv(path, report=None, progress=None):
+    devices = []
+    for batch in iter_import_batches(path, report, progress=progress):
+        devices.extend(batch)
+    return devices
+
+
+def export_csv(path, devices, progress=None, total=None, device_types=None):
+    # Stream one CSV row per port through a large write buffer, a device at a
+    # time. device_types, if given, limits the export to those types.
+    # devices may be any iterable; pass total for progress when it has no len().
+    total = (total if total is not None else len(devices)) or 1
+    with open(path, "w", newline="", buffering=EXPORT_BUFFER_SIZE) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(CSV_HEADER + LOCATION_COLUMNS)
+
+        for count, device in enumerate(devices, start=1):
+            if device_types is None or device.type in device_types:
+                ports = device.ports
+                name, device_type = device.name, device.type
+                site, rack = device.site or "", device.rack or ""
+                writer.writerows(
+                    [
+                        name,
+                        device_type,
+                        i + 1,
+                        ports.connected_to(i) or "",
+                        "Yes" if ports.has(i, POE) else "No",
+                        "Yes" if ports.has(i, VLAN) else "No",
+                        site,
+                        rack,
+                    ]
+                    for i in range(len(ports))
+                )
+            if progress is not None and count % 100 == 0:
+                progress(count / total)
@@ -0,0 +1,88 @@
+# generator.py
+#
+# Synthetic inventories for benchmarks and demos. Each site gets a core router,
+# a core switch and a cross-connect; each rack gets a patch panel and one or
+# two access switches (24 or 48 ports). Cables run
+#
+#     access switch port -> rack patch panel -> site cross-connect -> core switch
+#
+# so traces pass through two pass-through devices, as in a real building.
+# Output is deterministic for a given seed.
+
+import random
+
+from graph import format_endpoint
+from models import Device, InternTable, POE, VLAN, SFP
+
+# Defaults for generate_inventory
+SITES = 1
+RACKS_PER_SITE = 10
+PATCH_PANEL_PORTS = 48
+CROSS_CONNECT_PORTS = 288
+CORE_SWITCH_PORTS = 48
+ROUTER_PORTS = 4
+# Share of access switch ports that are patched
+PATCHED_SHARE = 0.75
+
+
+def generate_inventory(sites=SITES, racks_per_site=RACKS_PER_SITE, seed=0):
+    # List of Devices for sites x racks_per_site racks
+    rng = random.Random(seed)
+    strings = InternTable()
+    devices = []
+    for site in range(1, sites + 1):
+        devices.extend(_generate_site(rng, strings, f"S{site:02d}", racks_per_site))
+    return devices
+
+
+def generate_devices(device_count, seed=0):
+    # Roughly device_count devices (whole racks, ~3.5 devices each, plus 3 per site)
+    racks = max(1, round((device_count - 3) / 3.5))
+    return generate_inventory(1, racks, seed)
+
+
+def _generate_site(rng, strings, site, racks):
+    # Site-level devices have a site but no rack
+    router = Device("Router", f"{site}-RTR01", ROUTER_PORTS, site, strings=strings)
+    core = Device("Switch", f"{site}-CORE01", CORE_SWITCH_PORTS, site, strings=strings)
+    cross_connect = Device("Cross Connect", f"{site}-XC01", CROSS_CONNECT_PORTS, site, strings=strings)
+
+    # Core uplinks to the router, on SFP ports
+    for i in range(2):
+        core.ports.set_connected_to(CORE_SWITCH_PORTS - 1 - i, format_endpoint(router.name, i))
+        core.ports.set_flag(CORE_SWITCH_PORTS - 1 - i, SFP, True)
+    router.ports.set_connected_to(ROUTER_PORTS - 1, "WAN")
+
+    devices = [router, core, cross_connect]
+    xc_port = 0
+    for rack in range(1, racks + 1):
+        rack_label = f"R{rack:03d}"
+        rack_name = f"{site}-{rack_label}"
+        panel = Device("Patch Panel", f"{rack_name}-PP01", PATCH_PANEL_PORTS, site, rack_label, strings)
+        devices.append(panel)
+
+        # The panel's first ports are trunked back to the cross-connect, which is
+        # in turn patched to the core while core ports last
+        for trunk in range(2):
+            if xc_port < CROSS_CONNECT_PORTS:
+                panel.ports.set_connected_to(trunk, format_endpoint(cross_connect.name, xc_port))
+                if xc_port < CORE_SWITCH_PORTS - 2:
+                    core.ports.set_connected_to(xc_port, format_endpoint(cross_connect.name, xc_port))
+                xc_port += 1
+
+        panel_port = 2
+        for number in range(1, rng.choice((1, 2)) + 1):
+            switch = Device("Switch", f"{rack_name}-SW{number:02d}", rng.choice((24, 48)), site, rack_label,
+                            strings)
+            devices.append(switch)
+            ports = switch.ports
+            uplink = len(ports) - 1
+            ports.set_connected_to(uplink, format_endpoint(panel.name, number - 1))
+            ports.set_flag(uplink, SFP, True)
+            for i in range(uplink):
+                ports.set_flag(i, POE, rng.random() < 0.6)
+                ports.set_flag(i, VLAN, rng.random() < 0.3)
+                if panel_port < PATCH_PANEL_PORTS and rng.random() < PATCHED_SHARE:
+                    ports.set_connected_to(i, format_endpoint(panel.name, panel_port))
+                    panel_port += 1
+    return devices
@@ -0,0 +1,191 @@
+# graph.py
+
+import re
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+# Device types whose ports pass a circuit straight through (front to rear)
+PASS_THROUGH_TYPES = {"Patch Panel", "Cross Connect"}
+
+# "Core Switch Port 3", "Core Switch:3", "Core Switch/3" or "Core Switch #3"
+ENDPOINT_PATTERN = re.compile(r"^\s*(.+?)(?:\s+port\s+|\s*[:/#]\s*)(\d+)\s*$", re.IGNORECASE)
+
+
+class Endpoint(NamedTuple):
+    # One end of a cable: a device port (0-based), or free text such as "WAN" with port None
+    device: str
+    port: Optional[int]
+
+    def __str__(self):
+        return self.device if self.port is None else format_endpoint(self.device, self.port)
+
+
+def format_endpoint(device_name, port_index):
+    # Canonical connected_to text for a device port, matching the "Port N" labels in the views
+    return f"{device_name} Port {port_index + 1}"
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_endpoint(text):
+    match = ENDPOINT_PATTERN.match(text)
+    if match and int(match.group(2)) > 0:
+        return Endpoint(match.group(1), int(match.group(2)) - 1)
+    return Endpoint(text.strip(), None)
+
+
+class ConnectionGraph:
+    # Undirected graph of cables between endpoints, built from each port's
+    # connected_to text. Either end (or both) may declare a link, so each
+    # adjacency carries a count of the ports declaring it; a link disappears
+    # only when no port declares it any more.
+    def __init__(self):
+        self._links = defaultdict(dict)  # Endpoint -> {peer Endpoint: declaring port count}
+        self._declared = {}              # Endpoint -> Endpoint its own connected_to names
+        self._device_types = {}          # Device name -> type, for pass-through checks
+        self._by_device = defaultdict(set)  # Device name -> its endpoints that have links
+
+    def __len__(self):
+        # Number of distinct links
+        return sum(len(peers) for peers in self._links.values()) // 2
+
+    def rebuild(self, devices):
+        self._links.clear()
+        self._declared.clear()
+        self._device_types.clear()
+        self._by_device.clear()
+        for device in devices:
+            self.add_device(device)
+
+    def rebuild_from_rows(self, device_types, connections):
+        # Build from (name, type) and (name, port_index, connected_to) rows, e.g. from a SQLiteStore
+        self._links.clear()
+        self._declared.clear()
+        self._by_device.clear()
+        self._device_types = dict(device_types)
+        for device_name, port_index, connected_to in connections:
+            self.set_port(device_name, port_index, connected_to)
+
+    def adopt(self, other):
+        # Take over a graph built elsewhere (e.g. on a worker thread) in one step
+        self._links = other._links
+        self._declared = other._declared
+        self._device_types = other._device_types
+        self._by_device = other._by_device
+
+    def add_device(self, device):
+        self._device_types[device.name] = device.type
+        ports = device.ports
+        for port_index in range(len(ports)):
+            connected_to = ports.connected_to(port_index)
+            if connected_to:
+                self.set_port(device.name, port_index, connected_to)
+
+    def set_port(self, device_name, port_index, connected_to):
+        # Update the graph after a port's connected_to text changed
+        endpoint = Endpoint(device_name, port_index)
+        new_peer = parse_endpoint(connected_to) if connected_to else None
+        old_peer = self._declared.get(endpoint)
+        if old_peer == new_peer:
+            return
+        if old_peer is not None:
+            self._unlink(endpoint, old_peer)
+            del self._declared[endpoint]
+        if new_peer is not None and new_peer != endpoint:
+            self._declared[endpoint] = new_peer
+            self._link(endpoint, new_peer)
+
+    def has_device(self, device_name):
+        return device_name in self._device_types
+
+    def peers(self, endpoint):
+        # Endpoints cabled directly to this one
+        return set(self._links.get(endpoint, ()))
+
+    def peer(self, device_name, port_index):
+        # The single far end of a port's cable, or None if it has none (or several)
+        peers = self._links.get(Endpoint(device_name, port_index))
+        if peers and len(peers) == 1:
+            return next(iter(peers))
+        return None
+
+    def is_pass_through(self, endpoint):
+        return endpoint.port is not None and self._device_types.get(endpoint.device) in PASS_THROUGH_TYPES
+
+    def trace(self, endpoint):
+        # End-to-end path through any patch panels and cross-connects, as a list of
+        # endpoints. A pass-through start is traced in both directions.
+        links = self._links.get(endpoint, {})
+        directions = list(links)
+        if not directions:
+            return [endpoint]
+        visited = {endpoint}
+        forward = self._walk(endpoint, directions[0], visited)
+        if len(directions) > 1 and self.is_pass_through(endpoint):
+            backward = self._walk(endpoint, directions[1], visited)
+            return backward[::-1] + [endpoint] + forward
+        return [endpoint] + forward
+
+    def component(self, endpoint):
+        # Every endpoint reachable from this one over any number of links
+        seen = {endpoint}
+        queue = deque([endpoint])
+        while queue:
+            for peer in self._links.get(queue.popleft(), ()):
+                if peer not in seen:
+                    seen.add(peer)
+                    queue.append(peer)
+        return seen
+
+    def components(self):
+        # All connected components with at least one link
+        seen = set()
+        for endpoint in list(self._links):
+            if endpoint not in seen:
+                component = self.component(endpoint)
+                seen |= component
+                yield component
+
+    def device_links(self, device_name):
+        # {port_index: peers} for every linked port of a device
+        return {
+            endpoint.port: set(self._links[endpoint])
+            for endpoint in self._by_device.get(device_name, ())
+            if endpoint.port is not None
+        }
+
+    def _walk(self, start, first_step, visited):
+        # Follow the cable from start, passing straight through pass-through ports
+        path = []
+        previous, current = start, first_step
+        while current not in visited:
+            visited.add(current)
+            path.append(current)
+            if not self.is_pass_through(current):
+                break
+            onward = [peer for peer in self._links.get(current, ()) if peer != previous]
+            if not onward:
+                break
+            previous, current = current, onward[0]
+        return path
+
+    def _link(self, a, b):
+        self._links[a][b] = self._links[a].get(b, 0) + 1
+        self._links[b][a] = self._links[b].get(a, 0) + 1
+        self._by_device[a.device].add(a)
+        self._by_device[b.device].add(b)
+
+    def _unlink(self, a, b):
+        for x, y in ((a, b), (b, a)):
+            peers = self._links.get(x)
+            if peers is None or y not in peers:
+                continue
+            if peers[y] > 1:
+                peers[y] -= 1
+            else:
+                del peers[y]
+                if not peers:
+                    del self._links[x]
+                    self._by_device[x.device].discard(x)
+                    if not self._by_device[x.device]:
+                        del self._by_device[x.device]
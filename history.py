@@ -0,0 +1,126 @@
+# history.py
+#
+# Undo/redo kept as inverse operations rather than copies of the inventory.
+# Each entry holds, for every port it touched, the port's (connected_to,
+# flags) before and after the edit, so memory grows with the size of the
+# edits, not with the inventory. The connected_to strings are the interned
+# ones the ports already share, so an entry costs little more than its
+# tuples. Once the entries' estimated size passes the budget, the oldest are
+# dropped.
+
+from collections import deque
+from contextlib import contextmanager
+
+# Estimated bytes held by undo/redo entries before the oldest are dropped
+UNDO_MEMORY_BUDGET = 16 << 20
+# Rough cost of one port change in an entry: dict slot, key and state tuples
+PORT_CHANGE_BYTES = 200
+ENTRY_BYTES = 300
+
+
+class Edit:
+    __slots__ = ("label", "ports", "size")
+
+    def __init__(self, label):
+        self.label = label
+        self.ports = {}  # (device_index, port_index) -> [state before, state after]
+        self.size = ENTRY_BYTES
+
+    def states(self, after):
+        # {device_index: {port_index: state}} with the states from after (redo) or before (undo) the edit
+        devices = {}
+        for (device_index, port_index), (before, later) in self.ports.items():
+            devices.setdefault(device_index, {})[port_index] = later if after else before
+        return devices
+
+
+class History:
+    def __init__(self, budget=UNDO_MEMORY_BUDGET):
+        self.budget = budget
+        self.memory_used = 0
+        self._undo = deque()
+        self._redo = []
+        self._open = None    # Edit collecting records while a group is open
+        self._depth = 0
+        self._paused = False
+
+    @contextmanager
+    def group(self, label):
+        # Everything recorded inside is undone as one step; nested groups join the outermost
+        if self._depth == 0:
+            self._open = Edit(label)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                edit, self._open = self._open, None
+                if edit.ports:
+                    self._push(edit)
+
+    @contextmanager
+    def paused(self):
+        # Changes made while undoing or redoing are not themselves recorded
+        self._paused = True
+        try:
+            yield
+        finally:
+            self._paused = False
+
+    def record(self, device_index, port_index, before, after):
+        # One port's change; must be called inside group()
+        if self._paused or before == after:
+            return
+        key = (device_index, port_index)
+        states = self._open.ports.get(key)
+        if states is None:
+            self._open.ports[key] = [before, after]
+            self._open.size += PORT_CHANGE_BYTES
+        else:
+            states[1] = after  # Edited twice in one step: keep the first before, the last after
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_label(self):
+        return self._undo[-1].label if self._undo else None
+
+    def redo_label(self):
+        return self._redo[-1].label if self._redo else None
+
+    def undo(self):
+        # The latest edit, moved to the redo stack, or None
+        if not self._undo:
+            return None
+        edit = self._undo.pop()
+        self._redo.append(edit)
+        return edit
+
+    def redo(self):
+        if not self._redo:
+            return None
+        edit = self._redo.pop()
+        self._undo.append(edit)
+        return edit
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.memory_used = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+    def _push(self, edit):
+        # A new edit makes the redo stack meaningless
+        for dropped in self._redo:
+            self.memory_used -= dropped.size
+        self._redo.clear()
+        self._undo.append(edit)
+        self.memory_used += edit.size
+        while self.memory_used > self.budget and len(self._undo) > 1:
+            self.memory_used -= self._undo.popleft().size
@@ -1,26 +1,48 @@
 # inventory.py
 
-import json
-import csv
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, filedialog
+from core import DEVICE_TYPES, Inventory
+from graph import format_endpoint
+from history import History
+from port_editor import PortEditor
+from profiling import PROFILER
 
-# Define supported device types and default ports
-DEVICE_TYPES = {
-    "Router": 4,
-    "Switch": 24,
-    "Firewall": 2,
-    "Patch Panel": 48,
-    "UPS": 2,
-}
+# Storage, CSV and report modules are imported by the commands that use them,
+# keeping them (and json, csv, sqlite3, NumPy) out of the startup path.
 
 class InventoryManager:
+    # Tk dialogs on top of the headless core.Inventory
     def __init__(self, parent):
         self.parent = parent
-        self.devices = []
+        self.inventory = Inventory()
+        self.inventory.history = History()  # Undo/redo for port edits
+        self.compact_save = tk.BooleanVar(value=False)  # Save without indentation
+
+    @property
+    def devices(self):
+        return self.inventory.devices
+
+    @property
+    def search_index(self):
+        return self.inventory.search_index  # Kept in sync by add, load and port edits
+
+    @property
+    def graph(self):
+        return self.inventory.graph  # Both ends of every cable; also kept in sync
+
+    @property
+    def store(self):
+        return self.inventory.store  # Active SQLiteStore, if any
+
+    def worker_devices(self):
+        # The device list to hand to a worker. A plain list is copied; a
+        # LazyDeviceList or ShardedDeviceList is passed as it is and reads what it
+        # does not hold on the worker, instead of loading everything here.
+        return list(self.devices) if isinstance(self.devices, list) else self.devices
 
     def add_device(self):
-        # Prompt for device type
+        # Prompt for device type; returns the new Device, or None if nothing was added
         device_type = simpledialog.askstring("Device Type", "Enter device type (e.g., Router, Switch):")
         if not device_type or device_type not in DEVICE_TYPES:
             messagebox.showerror("Invalid Device", "Please enter a valid device type.")
@@ -32,148 +54,406 @@ class InventoryManager:
             messagebox.showerror("Invalid Name", "Device name cannot be empty.")
             return
         
-        # Determine number of ports based on device type
-        port_count = DEVICE_TYPES.get(device_type, 0)
-        
-        # Create a device entry and add to the list
-        device = {
-            "type": device_type,
-            "name": device_name,
-            "ports": [{"connected_to": None, "options": {"PoE": False, "VLAN": False}} for _ in range(port_count)]
-        }
-        self.devices.append(device)
-        messagebox.showinfo("Device Added", f"Added {device_type} named '{device_name}' with {port_count} ports.")
+        # Create a device entry with the type's default port count and add to the list
+        try:
+            device = self.inventory.add_device(device_type, device_name)
+        except ValueError as error:
+            messagebox.showerror("Invalid Name", str(error))
+            return
+        messagebox.showinfo("Device Added", f"Added {device_type} named '{device_name}' with {len(device.ports)} ports.")
+        return device
+
+    def provision_devices(self):
+        # Add many devices from a template; the views are refreshed once for the whole batch
+        from provision_dialog import ProvisionDialog
+        from templates import TemplateLibrary
+        try:
+            library = TemplateLibrary()
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Provision Devices", f"Could not read the device templates: {error}")
+            return
+        ProvisionDialog(self.parent.root, library, self._provision)
+
+    def _provision(self, template, count, start, site, rack):
+        devices = self.inventory.provision(template, count, start, site, rack)
+        self.parent.refresh_port_mapping()
+        self.parent.refresh_cable_management()
+        self.parent.refresh_hierarchy()
+        messagebox.showinfo("Provision Devices", f"Added {len(devices)} {template.device_type} device(s).")
+
+    def set_device_location(self):
+        # Prompt for a device and its new site and rack; returns True if it was moved
+        device_name = simpledialog.askstring("Set Location", "Enter the name of the device to move:")
+        if not device_name:
+            return
+        device_index = self.inventory.find_device(device_name)
+        if device_index is None:
+            messagebox.showerror("Set Location", f"No device named '{device_name}'.")
+            return
+        device = self.devices[device_index]
+        site = simpledialog.askstring("Set Location", f"Site of {device_name} (empty for none):",
+                                      initialvalue=device.site or "")
+        if site is None:
+            return
+        rack = simpledialog.askstring("Set Location", f"Rack of {device_name} (empty for none):",
+                                      initialvalue=device.rack or "")
+        if rack is None:
+            return
+        self.inventory.set_location(device_index, site.strip(), rack.strip())
+        return True
 
     def list_devices(self):
         # Return a list of device names and types
-        return [(device["name"], device["type"]) for device in self.devices]
+        return self.inventory.list_devices()
 
     def view_device_ports(self, device_index):
-        # Display a dialog with port details for the selected device
+        # Display a dialog with port details for the selected device. The editor only
+        # builds widgets for the rows in view, so large devices open immediately.
         device = self.devices[device_index]
-        device_name = device["name"]
+        device_name = device.name
+        ports = device.ports
 
-        # Create a new window for port details
-        port_window = tk.Toplevel(self.parent.root)
-        port_window.title(f"Ports for {device_name}")
-        port_window.geometry("400x400")
+        with PROFILER.span("view_device_ports"):
+            # Create a new window for port details
+            port_window = tk.Toplevel(self.parent.root)
+            port_window.title(f"Ports for {device_name}")
+            port_window.geometry("400x400")
 
-        # Add a canvas for scrollable content
-        canvas = tk.Canvas(port_window)
-        scrollbar = ttk.Scrollbar(port_window, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
+            editor = PortEditor(port_window, ports)
+            editor.frame.pack(fill="both", expand=True)
 
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
+        # Save changes to the port configuration
+        def save_port_changes():
+            with PROFILER.span("view_device_ports.save"):
+                changes = editor.changes()
 
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+                # Only the edited ports are written, re-indexed and journaled, as one undo step
+                if changes:
+                    self.inventory.set_ports(device_index, changes)
 
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+                    # Ports were edited in place, so only this device's rows need redrawing
+                    self.parent.refresh_device_ports(device_index, changes)
 
-        # Port list frame with headers
-        port_frame = ttk.Frame(port_window)
-        port_frame.pack(fill="both", expand=True)
+            messagebox.showinfo("Saved", f"Port configuration saved for {device_name}")
+            port_window.destroy()
 
-        headers = ["Port", "Connected To", "PoE", "VLAN"]
-        for col, text in enumerate(headers):
-            header_label = ttk.Label(port_frame, text=text, font=("Arial", 10, "bold"))
-            header_label.grid(row=0, column=col, padx=5, pady=5)
+        # Save button
+        save_button = ttk.Button(port_window, text="Save", command=save_port_changes)
+        save_button.pack(pady=10)
 
-        # Display each port and its settings
-        connection_entries = []  # Store references to the connection entries for saving
-        poe_vars = []            # Store PoE BooleanVars
-        vlan_vars = []           # Store VLAN BooleanVars
+    def save_inventory(self):
+        # With a database open, write only the rows that changed
+        from shards import ShardedDeviceList
+        autosave = self.parent.autosave
+        if isinstance(self.devices, ShardedDeviceList):
+            # Rewrite just the changed racks' shards and the manifest
+            manifest_path, mark = self.devices.path, autosave.mark()
 
-        for i, port in enumerate(device["ports"]):
-            port_num_label = ttk.Label(port_frame, text=f"Port {i + 1}")
-            port_num_label.grid(row=i + 1, column=0, padx=5, pady=5)
+            def saved_shards(result):
+                autosave.rebase(manifest_path, mark)
+                messagebox.showinfo("Save Inventory", f"Inventory saved ({result} shards written).")
 
-            # Connection entry
-            connection_var = tk.StringVar(value=port["connected_to"] or "")
-            connection_entry = ttk.Entry(port_frame, textvariable=connection_var, width=15)
-            connection_entry.grid(row=i + 1, column=1, padx=5, pady=5)
-            connection_entries.append((i, connection_var))  # Track port index and variable
+            self.run_in_background(
+                "Saving Shards",
+                lambda task: self.inventory.save_shards(manifest_path, progress=task.report),
+                saved_shards,
+                write_path=manifest_path,
+                span="save_inventory",
+            )
+            return
 
-            # PoE checkbox
-            poe_var = tk.BooleanVar(value=port["options"].get("PoE", False))
-            poe_check = ttk.Checkbutton(port_frame, text="PoE", variable=poe_var)
-            poe_check.grid(row=i + 1, column=2, padx=5, pady=5)
-            poe_vars.append((i, poe_var))
+        if self.store is not None:
+            store_path, mark = self.store.path, autosave.mark()
 
-            # VLAN checkbox
-            vlan_var = tk.BooleanVar(value=port["options"].get("VLAN", False))
-            vlan_check = ttk.Checkbutton(port_frame, text="VLAN", variable=vlan_var)
-            vlan_check.grid(row=i + 1, column=3, padx=5, pady=5)
-            vlan_vars.append((i, vlan_var))
+            def saved_to_store(result):
+                autosave.rebase(store_path, mark)
+                messagebox.showinfo("Save Inventory", f"Inventory saved ({result} rows written).")
 
-        # Save changes to the port configuration
-        def save_port_changes():
-            for i, connection_var in connection_entries:
-                device["ports"][i]["connected_to"] = connection_var.get()  # Save connection
-            for i, poe_var in poe_vars:
-                device["ports"][i]["options"]["PoE"] = poe_var.get()  # Save PoE
-            for i, vlan_var in vlan_vars:
-                device["ports"][i]["options"]["VLAN"] = vlan_var.get()  # Save VLAN
+            self.run_in_background(
+                "Saving to Database",
+                lambda task: self.inventory.save_store(progress=task.report),
+                saved_to_store,
+                write_path=store_path,
+                span="save_inventory",
+            )
+            return
 
-            # Refresh the port mapping and cable management views
-            self.parent.refresh_port_mapping()
-            self.parent.refresh_cable_management()
+        # Open file dialog to save the inventory as JSON
+        file_path = filedialog.asksaveasfilename(defaultextension=".json",
+                                                 filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")])
+        if file_path:
+            devices = list(self.devices)  # Snapshot the list; the UI stays usable while saving
+            compact = self.compact_save.get()
+            mark = autosave.mark()
 
-            messagebox.showinfo("Saved", f"Port configuration saved for {device_name}")
-            port_window.destroy()
+            def saved(result):
+                # The file now holds everything up to mark; the journal only needs what came after
+                autosave.rebase(file_path, mark)
+                messagebox.showinfo("Save Inventory", "Inventory saved successfully.")
 
-        # Save button
-        save_button = ttk.Button(scrollable_frame, text="Save", command=save_port_changes)
-        save_button.grid(row=len(device["ports"]) + 1, column=0, columnspan=4, pady=10)
-    
-    def save_inventory(self):
-            # Open file dialog to save the inventory as JSON
-            file_path = filedialog.asksaveasfilename(defaultextension=".json", 
-                                                    filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")])
-            if file_path:
-                with open(file_path, "w") as file:
-                    json.dump(self.devices, file, indent=4)
-                tk.messagebox.showinfo("Save Inventory", "Inventory saved successfully.")
+            self.run_in_background(
+                "Saving Inventory",
+                lambda task: self.inventory.save_json(file_path, compact, progress=task.report, devices=devices),
+                saved,
+                write_path=file_path,
+                span="save_inventory",
+            )
 
     def load_inventory(self):
-        # Open file dialog to load inventory from JSON
+        # Open file dialog to load inventory from JSON; parsing and indexing happen on a worker
         file_path = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")])
         if file_path:
-            with open(file_path, "r") as file:
-                self.devices = json.load(file)
-            tk.messagebox.showinfo("Load Inventory", "Inventory loaded successfully.")
+            self.run_in_background(
+                "Loading Inventory",
+                lambda task: Inventory.from_json(file_path, progress=task.report),
+                lambda loaded: self._finish_open(loaded, file_path, "Load Inventory", "Inventory loaded successfully."),
+                span="load_inventory",
+            )
+
+    def open_database(self):
+        # Open a SQLite inventory; devices are read a page at a time as the views need them
+        file_path = filedialog.askopenfilename(filetypes=[("SQLite Databases", "*.db *.sqlite"), ("All Files", "*.*")])
+        if file_path:
+            self.run_in_background(
+                "Opening Database",
+                lambda task: Inventory.from_store(file_path),
+                lambda loaded: self._finish_open(
+                    loaded, file_path, "Open Database", f"Opened {len(loaded.devices)} devices."
+                ),
+                span="open_database",
+            )
+
+    def open_sharded(self):
+        # Open a site/rack sharded inventory; only its manifest is read up front
+        file_path = filedialog.askopenfilename(filetypes=[("Sharded Inventories", "*.manifest.json"),
+                                                          ("All Files", "*.*")])
+        if file_path:
+            self.run_in_background(
+                "Opening Sharded Inventory",
+                lambda task: Inventory.from_shards(file_path),
+                lambda loaded: self._finish_open(
+                    loaded, file_path, "Open Sharded Inventory", f"Opened {len(loaded.devices)} devices."
+                ),
+                span="open_sharded",
+            )
 
-    def export_to_csv(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", 
+    def _finish_open(self, loaded, file_path, title, message):
+        # Runs on the Tk thread once the background load has finished
+        self.inventory.adopt(loaded)
+        self.parent.autosave.start(self.inventory, base_path=file_path)  # Journal edits on top of the file
+        self.parent.refresh_port_mapping()
+        self.parent.refresh_cable_management()
+        self.parent.refresh_hierarchy()
+        messagebox.showinfo(title, message)
+
+    def save_as_sharded(self):
+        # Write one shard per rack plus a manifest and keep saving there, a rack at a time
+        file_path = filedialog.asksaveasfilename(defaultextension=".manifest.json",
+                                                 filetypes=[("Sharded Inventories", "*.manifest.json"),
+                                                            ("All Files", "*.*")])
+        if file_path:
+            from shards import device_states, write_shards
+            devices = self.worker_devices()
+            mark = self.parent.autosave.mark()
+
+            def write(task):
+                snapshot = list(devices)  # Racks or pages not held in memory are read here, on the worker
+                states = device_states(snapshot)
+                write_shards(file_path, snapshot, progress=task.report)
+                return snapshot, states
+
+            self.run_in_background(
+                "Saving Shards",
+                write,
+                lambda result: self._finish_save_as_sharded(file_path, *result, mark),
+                write_path=file_path,
+                span="save_as_sharded",
+            )
+
+    def _finish_save_as_sharded(self, file_path, devices, states, mark):
+        # devices is the snapshot that was written; devices added while writing are kept as new
+        self.inventory.attach_shards(file_path, devices, states)
+        self.parent.autosave.rebase(file_path, mark)
+        messagebox.showinfo("Save Inventory", "Inventory saved as shards.")
+
+    def save_as_database(self):
+        # Write the whole inventory to a new SQLite database and keep saving there
+        file_path = filedialog.asksaveasfilename(defaultextension=".db",
+                                                 filetypes=[("SQLite Databases", "*.db *.sqlite"), ("All Files", "*.*")])
+        if file_path:
+            devices = self.worker_devices()
+            mark = self.parent.autosave.mark()
+
+            def write(task):
+                snapshot = list(devices)  # Racks or pages not held in memory are read here, on the worker
+                return Inventory.write_store(file_path, snapshot, progress=task.report), snapshot
+
+            self.run_in_background(
+                "Saving Database",
+                write,
+                lambda result: self._finish_save_as_database(*result, mark),
+                write_path=file_path,
+            )
+
+    def _finish_save_as_database(self, store, devices, mark):
+        # devices is the snapshot that was written; devices added while writing are kept as new
+        self.inventory.attach_store(store, devices)
+        self.parent.autosave.rebase(store.path, mark)
+        messagebox.showinfo("Save Inventory", "Inventory saved to database.")
+
+    def export_to_csv(self, device_types=None):
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv",
                                                  filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")])
         if file_path:
-            with open(file_path, "w", newline="") as csv_file:
-                writer = csv.writer(csv_file)
-                writer.writerow(["Device Name", "Device Type", "Port Number", "Connected To", "PoE", "VLAN"])
-
-                for device in self.devices:
-                    for i, port in enumerate(device["ports"], start=1):
-                        writer.writerow([
-                            device["name"],
-                            device["type"],
-                            i,
-                            port["connected_to"] or "",
-                            "Yes" if port["options"]["PoE"] else "No",
-                            "Yes" if port["options"]["VLAN"] else "No"
-                        ])
-            tk.messagebox.showinfo("Export to CSV", "Inventory exported successfully to CSV.")
-            
-    def connection_helper(self, port_number):
-        connection_window = tk.Toplevel(self.root)
-        connection_window.title("Assign Connection")
+            devices = self.worker_devices()
+            self.run_in_background(
+                "Exporting to CSV",
+                lambda task: self.inventory.export_csv(file_path, device_types, progress=task.report, devices=devices),
+                lambda result: messagebox.showinfo("Export to CSV", "Inventory exported successfully to CSV."),
+                write_path=file_path,
+                span="export_to_csv",
+            )
+
+    def export_type_to_csv(self):
+        # Export only the ports of one device type
+        device_type = simpledialog.askstring("Device Type", "Export which device type (e.g., Switch)?")
+        if device_type:
+            self.export_to_csv(device_types={device_type})
+
+    def show_utilization_report(self):
+        # Port utilization, PoE budget and connection problems, computed on a worker
+        from analytics import utilization_report
+        devices = self.worker_devices()
+        self.run_in_background(
+            "Building Report",
+            lambda task: utilization_report(devices),
+            self._show_report,
+            span="utilization_report",
+        )
+
+    def _show_report(self, report):
+        from analytics import export_report, format_report
+        report_window = tk.Toplevel(self.parent.root)
+        report_window.title("Utilization Report")
+        report_window.geometry("720x420")
+
+        group = tk.StringVar(value="by_type")
+        text = tk.Text(report_window, font=("Courier", 10), wrap="none")
+
+        def show():
+            text.configure(state="normal")
+            text.delete("1.0", "end")
+            text.insert("1.0", format_report(report, group.get()))
+            text.configure(state="disabled")
+
+        def export():
+            file_path = filedialog.asksaveasfilename(
+                parent=report_window, defaultextension=".csv",
+                filetypes=[("CSV Files", "*.csv"), ("JSON Files", "*.json"), ("All Files", "*.*")])
+            if file_path:
+                try:
+                    export_report(file_path, report)
+                except OSError as error:
+                    messagebox.showerror("Export Report", f"Could not write the report: {error}", parent=report_window)
+
+        buttons = ttk.Frame(report_window)
+        buttons.pack(fill="x", padx=5, pady=5)
+        ttk.Radiobutton(buttons, text="By Type", variable=group, value="by_type", command=show).pack(side="left")
+        ttk.Radiobutton(buttons, text="By Rack", variable=group, value="by_rack", command=show).pack(side="left")
+        ttk.Button(buttons, text="Export...", command=export).pack(side="right")
+        text.pack(fill="both", expand=True, padx=5, pady=(0, 5))
+        show()
+
+    def import_from_csv(self):
+        # Append devices from a spreadsheet in the exported CSV layout; bad rows are skipped and reported
+        file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")])
+        if file_path:
+            from csv_io import ImportReport
+            report = ImportReport()
+            self.run_in_background(
+                "Importing CSV",
+                lambda task: Inventory.read_csv(file_path, report, progress=task.report),
+                lambda devices: self._finish_import(devices, report),
+                span="import_from_csv",
+            )
+
+    def _finish_import(self, devices, report):
+        self.inventory.import_devices(devices, report)
+        self.parent.refresh_port_mapping()
+        self.parent.refresh_cable_management()
+        self.parent.refresh_hierarchy()
+        messagebox.showinfo("Import CSV", report.summary())
+
+    def run_in_background(self, title, work, on_done, write_path=None, span=None):
+        # Hand work(task) to the app's TaskScheduler and show a progress bar with
+        # a Cancel button. work must not touch Tk; on_done(result) runs on the Tk thread.
+        # With span, both halves are timed for the profiler as "<span>.work" and "<span>.finish".
+        if span is not None:
+            work = PROFILER.wrap(f"{span}.work", work)
+            on_done = PROFILER.wrap(f"{span}.finish", on_done)
+        progress_window = tk.Toplevel(self.parent.root)
+        progress_window.title(title)
+        progress_window.geometry("300x90")
+        progress_bar = ttk.Progressbar(progress_window, maximum=1.0, length=260)
+        progress_bar.pack(padx=20, pady=(15, 5))
+
+        def update_progress(fraction):
+            progress_bar["value"] = fraction
+
+        def finish(result):
+            progress_window.destroy()
+            on_done(result)
+
+        def fail(error):
+            progress_window.destroy()
+            messagebox.showerror(title, f"Operation failed: {error}")
+
+        task = self.parent.tasks.submit(
+            work,
+            title=title,
+            on_done=finish,
+            on_error=fail,
+            on_progress=update_progress,
+            on_cancel=lambda payload: progress_window.destroy(),
+            write_path=write_path,
+        )
+        ttk.Button(progress_window, text="Cancel", command=task.cancel).pack()
+        progress_window.protocol("WM_DELETE_WINDOW", task.cancel)
+        return task
+
+    def set_port_connection(self, device_index, port_index, connected_to):
+        # Change one port's connection and keep the index, graph and views in sync
+        self.inventory.set_port_connection(device_index, port_index, connected_to)
+        self.parent.refresh_device_ports(device_index, [port_index])
+
+    def set_port(self, device_index, port_index, connected_to, flags):
+        # Change a port's connection and options together, as one undo step
+        self.inventory.set_ports(device_index, {port_index: (connected_to, flags)})
+        self.parent.refresh_device_ports(device_index, [port_index])
+
+    def undo(self):
+        # Returns False if there was nothing to undo
+        return self._refresh_restored(self.inventory.undo())
+
+    def redo(self):
+        return self._refresh_restored(self.inventory.redo())
+
+    def _refresh_restored(self, touched):
+        if touched is None:
+            return False
+        for device_index, port_indices in touched.items():
+            self.parent.refresh_device_ports(device_index, port_indices)
+        return True
+
+    def connection_helper(self, device_index, port_index):
+        # Pick the far end of a cable from the known devices instead of typing it
+        device = self.devices[device_index]
+        connection_window = tk.Toplevel(self.parent.root)
+        connection_window.title(f"Assign Connection for {format_endpoint(device.name, port_index)}")
         connection_window.geometry("300x250")
 
         ttk.Label(connection_window, text="Select Device:").pack(pady=5)
-        device_names = [device["name"] for device in self.inventory_manager.devices]
+        device_names = [device.name for device in self.devices]
         device_selection = ttk.Combobox(connection_window, values=device_names)
         device_selection.pack(pady=5)
 
@@ -184,7 +464,17 @@ class InventoryManager:
         def assign_connection():
             selected_device = device_selection.get()
             selected_port = port_selection.get()
-            self.port_mapping_table.insert("", "end", values=(port_number, selected_device, selected_port))
+            if not selected_device or not selected_port.isdigit() or int(selected_port) < 1:
+                messagebox.showerror("Invalid Connection", "Please select a device and enter a port number.")
+                return
+            # Both ends of the cable are undone together
+            with self.inventory.edit_group(f"Assign {format_endpoint(device.name, port_index)}"):
+                self.set_port_connection(device_index, port_index, format_endpoint(selected_device, int(selected_port) - 1))
+
+                # Also record the cable on the far end if it is a known device with that port
+                peer_index = device_names.index(selected_device) if selected_device in device_names else None
+                if peer_index is not None and int(selected_port) <= len(self.devices[peer_index].ports):
+                    self.set_port_connection(peer_index, int(selected_port) - 1, format_endpoint(device.name, port_index))
             connection_window.destroy()
 
         assign_button = ttk.Button(connection_window, text="Assign Connection", command=assign_connection)
@@ -0,0 +1,390 @@
+# journal.py
+#
+# Incremental autosave. Every edit is appended to a journal as one JSON line,
+# so the cost of autosaving is proportional to the edit, not the inventory.
+# The journal starts with a "base" line naming the file its operations apply
+# to; replaying the operations on top of the base recovers the state after a
+# crash. Compaction folds the journal into a numbered snapshot file.
+#
+# Compaction is crash-safe: the current journal is first rotated to
+# journal.1 and a fresh journal is started on the next snapshot's name. The
+# snapshot is then written atomically, journal.1 is deleted, and only then
+# is the previous snapshot deleted. If journal.1 still exists on startup,
+# recovery replays it before the current journal. If a compaction fails,
+# journal.1 is kept and the next compaction appends the current journal to
+# it instead of rotating over it.
+#
+# Inventories backed by a database or shards are not compacted: a snapshot
+# would have to load every device, so their journal just keeps growing
+# until the next save re-bases it.
+#
+# One process at a time owns the directory, through autosave.lock (created
+# with O_EXCL, holding the owner's pid). A second pyRack window neither
+# recovers nor journals; a lock left by a crashed process is taken over.
+
+import json
+import os
+import time
+
+from core import Inventory, is_database_path
+from models import Device
+
+# Fsync after this many operations, or when the oldest unsynced one is this old
+FSYNC_BATCH = 64
+FSYNC_INTERVAL = 1.0
+# Compact once the journal holds this many operations
+COMPACT_AFTER_OPS = 5000
+
+JOURNAL_NAME = "autosave.journal"
+LOCK_NAME = "autosave.lock"
+SNAPSHOT_PATTERN = "autosave-{generation}.json"
+
+
+def default_directory():
+    # Overridable with PYRACK_AUTOSAVE_DIR
+    return os.environ.get("PYRACK_AUTOSAVE_DIR") or os.path.join(os.path.expanduser("~"), ".pyrack")
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Journal:
+    # Append-only, line-per-operation log with batched fsync
+    def __init__(self, path, base):
+        self.path = path
+        self.base = base
+        self.ops = 0  # Operations written since the base line
+        self._file = open(path, "w", encoding="utf-8")
+        self._pending = 1  # The base line
+        self._oldest_pending = None
+        self._write(base)
+        self.sync()
+
+    def append(self, op):
+        # Flushed at once so a crashed process loses nothing; fsynced in batches
+        # so a power cut loses at most FSYNC_BATCH operations or FSYNC_INTERVAL seconds
+        self._write(op)
+        self._file.flush()
+        self.ops += 1
+        self._pending += 1
+        if self._oldest_pending is None:
+            self._oldest_pending = time.monotonic()
+        if self._pending >= FSYNC_BATCH or time.monotonic() - self._oldest_pending >= FSYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        # A no-op when nothing was appended since the last one, so the autosave
+        # tick costs nothing while the user is idle
+        if not self._pending:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._oldest_pending = None
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _write(self, op):
+        self._file.write(json.dumps(op, separators=(",", ":")) + "\n")
+
+
+def read_journal(path):
+    # (base, ops) from a journal file; a torn last line from a crash is ignored
+    base = None
+    ops = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            try:
+                op = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if base is None:
+                base = op
+            else:
+                ops.append(op)
+    return base, ops
+
+
+def apply_op(inventory, op):
+    # Replay one journal operation onto an Inventory; ValueError if it does not fit
+    kind = op.get("op")
+    try:
+        if kind == "add_device":
+            inventory.add_devices([Device.from_dict(op["device"], inventory.strings)])
+        elif kind == "set_port":
+            ports = inventory.devices[op["device"]].ports
+            ports.set_connected_to(op["port"], op["connected_to"])
+            ports.flags[op["port"]] = op["flags"]
+            inventory.ports_changed(op["device"], [op["port"]])
+        elif kind == "set_location":
+            site, rack = op["site"], op["rack"]
+            if not all(value is None or isinstance(value, str) for value in (site, rack)):
+                raise TypeError("site and rack must be text or null")
+            inventory.set_location(op["device"], site, rack)
+        else:
+            raise ValueError(f"Unknown journal operation {kind!r}")
+    except (KeyError, IndexError, TypeError, OverflowError) as error:
+        raise ValueError(f"Journal operation {kind!r} does not match the inventory it is based on ({error!r})") from None
+
+
+def _checkpoint(path):
+    # Fold a database's write-ahead log into the file, so that closing it
+    # later (which checkpoints too) does not change the file's signature
+    import sqlite3
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+
+
+def _lock_is_stale(path):
+    # True if the process named in the lock file has gone
+    try:
+        with open(path, encoding="ascii") as file:
+            pid = int(file.read())
+    except (OSError, ValueError):
+        return True  # Torn write from a crash, or removed meanwhile
+    if pid == os.getpid():
+        return False
+    if os.name == "nt":
+        return True  # os.kill would terminate it; the owner keeps the file open, so removing it fails instead
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass  # Running, as another user
+    return False
+
+
+def _append_ops(path, ops):
+    with open(path, "a", encoding="utf-8") as file:
+        for op in ops:
+            file.write(json.dumps(op, separators=(",", ":")) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class Autosave:
+    # Journal plus snapshots in one directory (default ~/.pyrack)
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        os.makedirs(self.directory, exist_ok=True)
+        self.journal_path = os.path.join(self.directory, JOURNAL_NAME)
+        self.rotated_path = self.journal_path + ".1"
+        self.lock_path = os.path.join(self.directory, LOCK_NAME)
+        self._lock_fd = None
+        self.journal = None
+        self.generation = 0
+        self._inventory = None
+        self._compacting = False
+
+    def acquire(self):
+        # Take the directory's lock; False if another running pyRack holds it
+        if self._lock_fd is not None:
+            return True
+        for attempt in range(2):
+            try:
+                fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                if attempt or not _lock_is_stale(self.lock_path):
+                    return False
+                try:
+                    os.remove(self.lock_path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    return False  # Still open in the process that holds it
+                continue
+            os.write(fd, str(os.getpid()).encode("ascii"))
+            self._lock_fd = fd
+            return True
+        return False
+
+    def release(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            os.remove(self.lock_path)
+
+    def start(self, inventory, base_path=None):
+        # Begin journaling edits to inventory, whose current state is base_path
+        # (a JSON file or database), or empty if base_path is None. Does
+        # nothing without the lock: the directory belongs to another window.
+        if self._lock_fd is None:
+            return
+        self._open_journal(inventory, self._file_base(base_path))
+        self._remove_rotated()
+        self._remove_stale_snapshots()
+
+    def mark(self):
+        # Position in the journal; take one before a save starts and pass it to rebase()
+        return self.journal, self.journal.ops if self.journal is not None else 0
+
+    def rebase(self, base_path, mark):
+        # After a save to base_path finishes, restart the journal on that file,
+        # carrying over only the edits made while the save was running
+        journal, ops = mark
+        if journal is None or journal is not self.journal:
+            return  # Compacted or reloaded meanwhile; the current base is still valid
+        journal.sync()
+        carried = read_journal(journal.path)[1][ops:]
+        self._open_journal(self._inventory, self._file_base(base_path))
+        for op in carried:
+            self.journal.append(op)
+        self._remove_rotated()  # Its edits are all in the saved file
+        self._remove_stale_snapshots()
+
+    def stop(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self._inventory is not None:
+            self._inventory.journal = None
+            self._inventory = None
+
+    def has_unsaved_changes(self):
+        if os.path.exists(self.rotated_path):
+            return True
+        if not os.path.exists(self.journal_path):
+            return False
+        return bool(read_journal(self.journal_path)[1])
+
+    def recover(self):
+        # Rebuild the inventory from the base file plus the journal(s)
+        inventory = None
+        for path in (self.rotated_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            base, ops = read_journal(path)
+            if inventory is None:
+                inventory = self._load_base(base)
+            for op in ops:
+                apply_op(inventory, op)
+        return inventory if inventory is not None else Inventory()
+
+    def resume(self, inventory):
+        # Continue from a recovered inventory: fold it into a fresh snapshot
+        # (once, at startup) and start a new journal on top of it
+        self.stop()
+        self.generation += 1
+        snapshot_path = self._snapshot_path(self.generation)
+        inventory.save_json(snapshot_path, compact=True)
+        self._open_journal(inventory, {"op": "base", "path": snapshot_path, "snapshot": True})
+        self._remove_rotated()
+        self._remove_stale_snapshots()
+
+    def discard(self):
+        self.stop()
+        for path in (self.rotated_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._remove_stale_snapshots(keep=None)
+
+    def set_aside(self):
+        # Like discard(), but for a journal that could not be recovered: the
+        # journal(s) and snapshots are moved to a broken-<time> directory, which is returned
+        self.stop()
+        target = os.path.join(self.directory, time.strftime("broken-%Y%m%d-%H%M%S"))
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name in (JOURNAL_NAME, JOURNAL_NAME + ".1") or (name.startswith("autosave-") and name.endswith(".json")):
+                os.replace(os.path.join(self.directory, name), os.path.join(target, name))
+        return target
+
+    def sync(self):
+        if self.journal is not None:
+            self.journal.sync()
+
+    def needs_compaction(self):
+        if self.journal is None or self._compacting or self.journal.ops < COMPACT_AFTER_OPS:
+            return False
+        return isinstance(self._inventory.devices, list)  # Not a LazyDeviceList or ShardedDeviceList
+
+    def begin_compaction(self):
+        # Tk thread: rotate the journal and return a job to run on a worker.
+        # Edits made while the job runs go to the new journal.
+        inventory = self._inventory
+        devices = inventory.devices[:]  # A plain list; see needs_compaction()
+        self.journal.close()
+        if os.path.exists(self.rotated_path):
+            # A previous compaction failed and journal.1 still holds edits the
+            # current journal builds on, so it is extended rather than replaced
+            with open(self.rotated_path, encoding="utf-8") as file:
+                rotated_base = json.loads(file.readline())
+            _append_ops(self.rotated_path, read_journal(self.journal_path)[1])
+            os.remove(self.journal_path)
+        else:
+            rotated_base = self.journal.base
+            os.replace(self.journal_path, self.rotated_path)
+        self.generation += 1
+        snapshot_path = self._snapshot_path(self.generation)
+        self._open_journal(inventory, {"op": "base", "path": snapshot_path, "snapshot": True})
+        previous_snapshot = rotated_base.get("path") if rotated_base.get("snapshot") else None
+        self._compacting = True
+
+        def compact(progress=None):
+            try:
+                inventory.save_json(snapshot_path, compact=True, progress=progress, devices=devices)
+                # start() may have re-based the journal meanwhile and removed these already
+                for path in (self.rotated_path, previous_snapshot):
+                    if path is not None and os.path.exists(path):
+                        os.remove(path)
+            finally:
+                self._compacting = False
+
+        return compact
+
+    def _open_journal(self, inventory, base):
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = Journal(self.journal_path, base)
+        self._inventory = inventory
+        inventory.journal = self.journal
+
+    def _remove_rotated(self):
+        # journal.1 from an earlier compaction; nothing depends on it once the journal is re-based
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def _file_base(self, base_path):
+        if base_path is None:
+            return {"op": "base", "path": None}
+        if is_database_path(base_path):
+            _checkpoint(base_path)
+        mtime, size = file_signature(base_path)
+        return {"op": "base", "path": os.path.abspath(base_path), "mtime": mtime, "size": size}
+
+    def _load_base(self, base):
+        path = base.get("path")
+        if path is None:
+            return Inventory()
+        if base.get("snapshot"):
+            self.generation = int(os.path.basename(path).split("-")[1].split(".")[0])
+            # Read once and then replaced, so a load cache beside it would only pile up
+            return Inventory.from_json(path, cache=False)
+        if is_database_path(path):
+            _checkpoint(path)  # Outside changes may still be in the write-ahead log
+        if file_signature(path) != (base["mtime"], base["size"]):
+            raise ValueError(f"{path} changed since the autosave journal was started; cannot replay it")
+        return Inventory.open(path)
+
+    def _snapshot_path(self, generation):
+        return os.path.join(self.directory, SNAPSHOT_PATTERN.format(generation=generation))
+
+    def _remove_stale_snapshots(self, keep="current"):
+        # Snapshots other than the one the current journal is based on, and
+        # any load caches left beside snapshots by earlier versions
+        current = self.journal.base.get("path") if keep and self.journal is not None else None
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith("autosave-") and name.endswith(".json") and path != current:
+                os.remove(path)
+            elif name.startswith(".autosave-") and name.endswith(".json.cache"):
+                os.remove(path)
@@ -1,10 +1,29 @@
 # main.py
 
+import time
+
+STARTED = time.perf_counter()  # Taken before the imports, for the startup probe
+
+import os
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import filedialog
 from inventory import InventoryManager
 from tkinter import simpledialog
+from table_view import PortRowModel, VirtualTable, port_mapping_row, cable_management_row
+from search import SearchSession
+from models import POE, VLAN, SFP
+from graph import Endpoint
+from tasks import TaskScheduler
+from journal import Autosave
+from refresh import RefreshScheduler
+from profiling import PROFILER
+
+# Delay (ms) after the last keystroke before the search runs
+SEARCH_DEBOUNCE_MS = 150
+# How often (ms) the autosave journal is flushed and checked for compaction
+AUTOSAVE_TICK_MS = 1000
 
 
 # Initialize the main application window
@@ -15,6 +34,9 @@ class NetworkInventoryApp:
         self.root.geometry("800x600")  # Set initial window size
         self.root.resizable(True, True)  # Allow resizing
 
+        # Worker pool for file I/O; results are handed back to Tk by polling
+        self.tasks = TaskScheduler(self.root)
+
         # Initialize inventory manager before creating menu
         self.inventory_manager = InventoryManager(self)
 
@@ -38,6 +60,8 @@ class NetworkInventoryApp:
         self.search_entry = ttk.Entry(self.device_list_frame, width=30)
         self.search_entry.pack(pady=5)
         self.search_entry.bind("<KeyRelease>", self.filter_devices)
+        self.search_session = SearchSession(self.inventory_manager.search_index)
+        self._search_job = None
 
         # Configure row and column weights for resizing
         self.main_frame.columnconfigure(0, weight=1)
@@ -47,10 +71,15 @@ class NetworkInventoryApp:
         # Initialize placeholder components
         self.create_device_list()
         self.create_port_mapping()
+        self.refresh_hierarchy()
 
         # Add buttons for managing devices in the Device List section
         add_device_button = ttk.Button(self.device_list_frame, text="Add Device", command=self.add_device)
         add_device_button.pack(pady=5)
+
+        provision_button = ttk.Button(self.device_list_frame, text="Provision Devices...",
+                                      command=self.inventory_manager.provision_devices)
+        provision_button.pack(pady=5)
         
         list_device_button = ttk.Button(self.device_list_frame, text="List Devices", command=self.list_devices)
         list_device_button.pack(pady=5)
@@ -58,6 +87,53 @@ class NetworkInventoryApp:
         view_ports_button = ttk.Button(self.device_list_frame, text="View Ports", command=self.view_device_ports)
         view_ports_button.pack(pady=5)
 
+        location_button = ttk.Button(self.device_list_frame, text="Set Location...", command=self.set_device_location)
+        location_button.pack(pady=5)
+
+        # Every edit is journaled; offer to replay the journal left by a crash
+        self.autosave = Autosave()
+        self.recover_autosave()
+        self.root.after(AUTOSAVE_TICK_MS, self.autosave_tick)
+
+
+    def recover_autosave(self):
+        inventory = self.inventory_manager.inventory
+        if not self.autosave.acquire():
+            messagebox.showwarning("Autosave", "Another pyRack window is autosaving to "
+                                   f"{self.autosave.directory}; edits in this window are not autosaved.")
+            return
+        if self.autosave.has_unsaved_changes() and messagebox.askyesno(
+            "Recover Changes", "The last session ended with unsaved changes. Recover them?"
+        ):
+            try:
+                inventory.adopt(self.autosave.recover())
+                self.autosave.resume(inventory)
+            except Exception as error:  # Anything, or every later start would fail the same way
+                # Keep the journal for a later attempt by hand rather than deleting the only copy
+                kept = self.autosave.set_aside()
+                messagebox.showerror("Recover Changes",
+                                     f"Could not recover the unsaved changes ({error}); they were moved to {kept}.")
+            else:
+                self.refresh_port_mapping()
+                self.refresh_cable_management()
+                self.refresh_hierarchy()
+                return
+        else:
+            self.autosave.discard()
+        self.autosave.start(inventory)
+
+    def autosave_tick(self):
+        # Flush any batched journal writes; fold a long journal into a snapshot on a worker
+        self.autosave.sync()
+        if self.autosave.needs_compaction():
+            compact = self.autosave.begin_compaction()
+            self.tasks.submit(
+                lambda task: compact(progress=task.report),
+                title="Compacting autosave",
+                on_error=lambda error: messagebox.showerror(
+                    "Autosave", f"Could not compact the autosave journal ({error}); it will be retried."),
+            )
+        self.root.after(AUTOSAVE_TICK_MS, self.autosave_tick)
 
     def create_menu(self):
         menu_bar = tk.Menu(self.root)
@@ -67,28 +143,135 @@ class NetworkInventoryApp:
         file_menu.add_command(label="New", command=self.new_inventory)
         file_menu.add_command(label="Save", command=self.inventory_manager.save_inventory)
         file_menu.add_command(label="Load", command=self.inventory_manager.load_inventory)
+        file_menu.add_command(label="Open Database...", command=self.inventory_manager.open_database)
+        file_menu.add_command(label="Save As Database...", command=self.inventory_manager.save_as_database)
+        file_menu.add_command(label="Open Sharded Inventory...", command=self.inventory_manager.open_sharded)
+        file_menu.add_command(label="Save As Sharded...", command=self.inventory_manager.save_as_sharded)
+        file_menu.add_command(label="Import CSV...", command=self.inventory_manager.import_from_csv)
         file_menu.add_command(label="Export to CSV", command=self.inventory_manager.export_to_csv)
+        file_menu.add_command(label="Export Device Type to CSV...", command=self.inventory_manager.export_type_to_csv)
+        file_menu.add_command(label="Utilization Report...", command=self.inventory_manager.show_utilization_report)
+        file_menu.add_checkbutton(label="Compact JSON", variable=self.inventory_manager.compact_save)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
 
         menu_bar.add_cascade(label="File", menu=file_menu)
 
+        # Edit menu; the labels name the step that would be undone or redone
+        self.edit_menu = tk.Menu(menu_bar, tearoff=0, postcommand=self.update_edit_menu)
+        self.edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        self.edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        menu_bar.add_cascade(label="Edit", menu=self.edit_menu)
+        for sequence, command in (("<Control-z>", self.undo), ("<Control-y>", self.redo), ("<Control-Z>", self.redo)):
+            self.root.bind_all(sequence, lambda event, command=command: self._edit_shortcut(event, command))
+
         # Help menu
         help_menu = tk.Menu(menu_bar, tearoff=0)
         help_menu.add_command(label="About", command=self.show_about)
+        help_menu.add_command(label="Redraw Statistics", command=self.show_redraw_stats)
+        help_menu.add_separator()
+        self.profiling_enabled = tk.BooleanVar(value=PROFILER.enabled)  # Also on with PYRACK_PROFILE=1
+        help_menu.add_checkbutton(
+            label="Enable Profiling",
+            variable=self.profiling_enabled,
+            command=lambda: PROFILER.set_enabled(self.profiling_enabled.get()),
+        )
+        help_menu.add_command(label="Profiling Stats...", command=self.show_profiling_stats)
         menu_bar.add_cascade(label="Help", menu=help_menu)
 
         self.root.config(menu=menu_bar)
 
+    def update_edit_menu(self):
+        history = self.inventory_manager.inventory.history
+        undo_label, redo_label = history.undo_label(), history.redo_label()
+        self.edit_menu.entryconfigure(0, label=f"Undo {undo_label}" if undo_label else "Undo",
+                                      state="normal" if undo_label else "disabled")
+        self.edit_menu.entryconfigure(1, label=f"Redo {redo_label}" if redo_label else "Redo",
+                                      state="normal" if redo_label else "disabled")
+
+    def undo(self):
+        if not self.inventory_manager.undo():
+            self.root.bell()
+
+    def redo(self):
+        if not self.inventory_manager.redo():
+            self.root.bell()
+
+    def _edit_shortcut(self, event, command):
+        # Leave Ctrl+Z/Ctrl+Y to text fields that have focus
+        widget_class = event.widget.winfo_class() if hasattr(event.widget, "winfo_class") else ""
+        if widget_class in ("Entry", "TEntry", "Text", "TCombobox", "TSpinbox"):
+            return
+        command()
+        return "break"
+
     def create_device_list(self):
         # Placeholder Label for Device List section
         device_list_label = ttk.Label(self.device_list_frame, text="Device List")
         device_list_label.pack()
 
+        # Site -> rack -> device tree. A rack's devices (and, for sharded
+        # inventories, its shard) are only loaded when the rack is expanded;
+        # selecting a node shows just its ports in the Port Mapping table.
+        self.hierarchy_tree = ttk.Treeview(self.device_list_frame, show="tree", height=8)
+        self.hierarchy_tree.pack(fill="both", expand=True, pady=5)
+        self.hierarchy_tree.bind("<<TreeviewOpen>>", self._expand_rack)
+        self.hierarchy_tree.bind("<<TreeviewSelect>>", self._select_hierarchy)
+        self._hierarchy = []
+
+    def refresh_hierarchy(self):
+        # Rebuild the site and rack nodes after devices were added or another inventory opened
+        tree = self.hierarchy_tree
+        tree.delete(*tree.get_children())
+        self._hierarchy = self.inventory_manager.inventory.hierarchy()
+        tree.insert("", "end", iid="all", text=f"All devices ({len(self.inventory_manager.devices)})")
+        for site_number, (site, racks) in enumerate(self._hierarchy):
+            tree.insert("", "end", iid=f"site:{site_number}", text=site, open=len(self._hierarchy) == 1)
+            for rack_number, (rack, device_indices) in enumerate(racks):
+                rack_iid = f"rack:{site_number}:{rack_number}"
+                tree.insert(f"site:{site_number}", "end", iid=rack_iid, text=f"{rack} ({len(device_indices)})")
+                tree.insert(rack_iid, "end", iid=f"{rack_iid}:pending")  # Placeholder so the rack can be expanded
+
+    def _hierarchy_devices(self, iid):
+        # Device indices under a hierarchy node, or None for "All devices"
+        kind, _, rest = iid.partition(":")
+        if kind == "site":
+            return [i for _, device_indices in self._hierarchy[int(rest)][1] for i in device_indices]
+        if kind == "rack":
+            site_number, rack_number = map(int, rest.split(":")[:2])
+            return self._hierarchy[site_number][1][rack_number][1]
+        if kind == "device":
+            return [int(rest)]
+        return None
+
+    def _expand_rack(self, event=None):
+        iid = self.hierarchy_tree.focus()
+        if not iid.startswith("rack:") or not self.hierarchy_tree.exists(f"{iid}:pending"):
+            return
+        self.hierarchy_tree.delete(f"{iid}:pending")
+        devices = self.inventory_manager.devices
+        for device_index in self._hierarchy_devices(iid):
+            device = devices[device_index]
+            self.hierarchy_tree.insert(iid, "end", iid=f"device:{device_index}", text=f"{device.name} ({device.type})")
+
+    def _select_hierarchy(self, event=None):
+        selection = self.hierarchy_tree.selection()
+        if not selection:
+            return
+        self.port_mapping_view.model.device_filter = self._hierarchy_devices(selection[0])
+        self.port_mapping_view.first = 0
+        self.refresh_port_mapping()
+
     def add_device(self):
-            # Call the add_device method from InventoryManager
-            self.inventory_manager.add_device()
-            self.refresh_cable_management()
+            # Call the add_device method from InventoryManager; nothing to redraw if it was cancelled
+            if self.inventory_manager.add_device() is not None:
+                self.refresh_port_mapping()
+                self.refresh_cable_management()
+                self.refresh_hierarchy()
+
+    def set_device_location(self):
+        if self.inventory_manager.set_device_location():
+            self.refresh_hierarchy()
 
     def list_devices(self):
         # Display device list in a message box
@@ -104,12 +287,22 @@ class NetworkInventoryApp:
         port_mapping_label = ttk.Label(self.port_mapping_frame, text="Port Mapping")
         port_mapping_label.pack()
 
-        # Treeview for port mapping table
-        self.port_mapping_table = ttk.Treeview(self.port_mapping_frame, columns=("Port", "Connected Device", "Connected Port"), show="headings")
-        self.port_mapping_table.heading("Port", text="Port")
-        self.port_mapping_table.heading("Connected Device", text="Connected Device")
-        self.port_mapping_table.heading("Connected Port", text="Connected Port")
-        self.port_mapping_table.pack(fill="both", expand=True)
+        # Treeview for port mapping table; rows are rendered on demand by a VirtualTable
+        port_mapping_container = ttk.Frame(self.port_mapping_frame)
+        port_mapping_container.pack(fill="both", expand=True)
+        self.port_mapping_table = ttk.Treeview(
+            port_mapping_container, columns=("Device", "Port", "Connected To", "PoE", "VLAN"), show="headings"
+        )
+        for column in ("Device", "Port", "Connected To", "PoE", "VLAN"):
+            self.port_mapping_table.heading(column, text=column)
+        port_mapping_scrollbar = ttk.Scrollbar(port_mapping_container, orient="vertical")
+        self.port_mapping_table.pack(side="left", fill="both", expand=True)
+        port_mapping_scrollbar.pack(side="right", fill="y")
+        self.port_mapping_view = VirtualTable(
+            self.port_mapping_table,
+            PortRowModel(lambda: self.inventory_manager.devices, port_mapping_row),
+            port_mapping_scrollbar,
+        )
 
         # Add right-click binding for editing port details
         self.port_mapping_table.bind("<Button-3>", self.edit_port_details)
@@ -118,36 +311,22 @@ class NetworkInventoryApp:
         cable_management_label = ttk.Label(self.port_mapping_frame, text="Cable Management View")
         cable_management_label.pack(pady=5)
 
-        self.cable_management_table = ttk.Treeview(
-            self.port_mapping_frame, columns=("Device", "Port", "Connected To"), show="headings"
-        )
-        self.cable_management_table.heading("Device", text="Device")
-        self.cable_management_table.heading("Port", text="Port")
-        self.cable_management_table.heading("Connected To", text="Connected To")
-        self.cable_management_table.pack(fill="both", expand=True)
+        self.create_cable_management_view()
+
+        # Redraws are queued here and applied together once Tk is idle
+        self.redraw = RefreshScheduler(self.root, [self.port_mapping_view, self.cable_management_view])
 
         # Refresh cable management list
         self.refresh_cable_management()
 
     def refresh_port_mapping(self):
-        # Clear existing rows
-        self.port_mapping_table.delete(*self.port_mapping_table.get_children())
-
-        # Populate Treeview with devices and their ports
-        for device_index, device in enumerate(self.inventory_manager.devices):
-            device_id = self.port_mapping_table.insert("", "end", text=f"{device['name']} ({device['type']})")
-
-            for port_index, port in enumerate(device["ports"]):
-                self.port_mapping_table.insert(
-                    device_id, "end",
-                    values=(
-                        f"Port {port_index + 1}",
-                        port["connected_to"] or "",
-                        "Yes" if port["options"].get("PoE") else "No",
-                        "Yes" if port["options"].get("VLAN") else "No"
-                    )
-                )
-    
+        # Re-layout the rows on the next idle; only the visible window is (re)rendered
+        self.redraw.invalidate_layout(self.port_mapping_view)
+
+    def refresh_device_ports(self, device_index, port_indices=None):
+        # Row-level update after a device's ports (or just port_indices) were edited in place
+        self.redraw.invalidate_device(device_index, port_indices)
+
     def new_inventory(self):
         # Placeholder function for creating a new inventory
         messagebox.showinfo("New Inventory", "New inventory setup not implemented yet.")
@@ -164,6 +343,62 @@ class NetworkInventoryApp:
         # Display information about the application
         messagebox.showinfo("About", "Network Rack Inventory Tool v1.0\nDesigned to help track network rack connections and devices.")
 
+    def show_redraw_stats(self):
+        stats = self.redraw.stats()
+        messagebox.showinfo(
+            "Redraw Statistics",
+            f"{stats['invalidations']} invalidations, {stats['redraws']} redraws\n"
+            f"Mean {stats['mean_ms']:.1f} ms, last {stats['last_ms']:.1f} ms, max {stats['max_ms']:.1f} ms",
+        )
+
+    def show_profiling_stats(self):
+        # Spans and counters recorded while profiling was on, with JSON and cProfile dumps
+        stats_window = tk.Toplevel(self.root)
+        stats_window.title("Profiling Stats")
+        stats_window.geometry("560x320")
+
+        columns = ("Name", "Count", "Total ms", "Mean ms", "Max ms")
+        table = ttk.Treeview(stats_window, columns=columns, show="headings")
+        for column in columns:
+            table.heading(column, text=column)
+            table.column(column, width=200 if column == "Name" else 80, anchor="w" if column == "Name" else "e")
+        table.pack(fill="both", expand=True, padx=5, pady=5)
+
+        def fill():
+            table.delete(*table.get_children())
+            snapshot = PROFILER.snapshot()
+            for name, span in sorted(snapshot["spans"].items(), key=lambda item: -item[1]["total_ms"]):
+                table.insert("", "end", values=(
+                    name, span["count"], f"{span['total_ms']:.1f}", f"{span['mean_ms']:.2f}", f"{span['max_ms']:.1f}"
+                ))
+            for name, count in sorted(snapshot["counters"].items()):
+                table.insert("", "end", values=(name, count, "", "", ""))
+
+        def reset():
+            PROFILER.reset()
+            fill()
+
+        def dump(kind):
+            extension = ".json" if kind == "json" else ".prof"
+            file_path = filedialog.asksaveasfilename(parent=stats_window, defaultextension=extension)
+            if not file_path:
+                return
+            try:
+                if kind == "json":
+                    PROFILER.dump_json(file_path)
+                else:
+                    PROFILER.dump_cprofile(file_path)
+            except (OSError, ValueError) as error:
+                messagebox.showerror("Profiling Stats", f"Could not write {file_path}: {error}", parent=stats_window)
+
+        button_frame = ttk.Frame(stats_window)
+        button_frame.pack(pady=5)
+        ttk.Button(button_frame, text="Refresh", command=fill).pack(side="left", padx=2)
+        ttk.Button(button_frame, text="Reset", command=reset).pack(side="left", padx=2)
+        ttk.Button(button_frame, text="Dump JSON...", command=lambda: dump("json")).pack(side="left", padx=2)
+        ttk.Button(button_frame, text="Dump cProfile...", command=lambda: dump("cprofile")).pack(side="left", padx=2)
+        fill()
+
     def view_device_ports(self):
         # Ask the user to select a device to view its ports
         devices = self.inventory_manager.list_devices()
@@ -183,80 +418,67 @@ class NetworkInventoryApp:
         self.inventory_manager.view_device_ports(selected_device - 1)
 
     def filter_devices(self, event=None):
+        # Debounce keystrokes: restart the timer so only the settled term is searched
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        self._search_job = None
+
         # Get the search term entered by the user
         search_term = self.search_entry.get().strip().lower()
 
         # Only Filter the list of devices in the inventory manager if query is > 3 characters
-        
         if len(search_term) > 3:
-            filtered_devices = [
-                (name, device_type)
-                for name, device_type in self.inventory_manager.list_devices()
-                if search_term in name.lower() or search_term in device_type.lower()
-            ]
-
-            # Display filtered devices in a message box (or another component as you prefer)
-            if not filtered_devices:
+            matches = self.search_session.search(search_term)
+
+            if not matches:
                 messagebox.showinfo("Device List", "No devices match your search. Add one!")
                 self.add_device()
             else:
-                # device_info = "\n".join([f"{name} ({device_type})" for name, device_type in filtered_devices])
-                # messagebox.showinfo("Filtered Device List", device_info)
-                # Refresh the Treeview with filtered devices
-                self.port_mapping_table.delete(*self.port_mapping_table.get_children())
-                for device in filtered_devices:
-                    device_id = self.port_mapping_table.insert("", "end", text=f"{device['name']} ({device['type']})")
-                    for port_index, port in enumerate(device["ports"]):
-                        self.port_mapping_table.insert(
-                            device_id, "end",
-                            values=(
-                                f"#{port_index + 1}",
-                                port["connected_to"] or "",
-                                "Yes" if port["options"].get("PoE") else "No",
-                                "Yes" if port["options"].get("VLAN") else "No"
-                            )
-                        )
+                # Show only the matching devices' ports in the Treeview
+                self.port_mapping_view.model.device_filter = matches
+                self.port_mapping_view.first = 0
+                self.refresh_port_mapping()
         else:
-            # Optionally reset the device list or show all devices
+            # Reset the device list to show all devices
             print("Enter at least 4 characters to search.")
-            self.refresh_port_mapping()
+            self.search_session.reset()
+            if self.port_mapping_view.model.device_filter is not None:
+                self.port_mapping_view.model.device_filter = None
+                self.refresh_port_mapping()
 
-            
-            
     def edit_port_details(self, event):
-        # Get selected item in Treeview
-        selected_item = self.port_mapping_table.selection()
-        if not selected_item:
+        # Select the row under the cursor, then resolve it to a device and port
+        item = self.port_mapping_table.identify_row(event.y)
+        if not item:
             return
-
-        # Retrieve current details
-        port_info = self.port_mapping_table.item(selected_item)["values"]
-        port_number, connected_device, connected_port, poe, vlan, sfp = port_info  # Update to include PoE, VLAN, and SFP
+        self.port_mapping_table.selection_set(item)
+        row = self.port_mapping_view.row_for_item(item)
+        device_index, port_index = self.port_mapping_view.model.locate(row)
+        device = self.inventory_manager.devices[device_index]
+        ports = device.ports
 
         # Open a pop-up dialog to edit/view port details
         edit_window = tk.Toplevel(self.root)
-        edit_window.title(f"Edit Port {port_number}")
-        edit_window.geometry("300x200")
+        edit_window.title(f"Edit {device.name} Port {port_index + 1}")
+        edit_window.geometry("320x220")
 
         # Display current port information
-        ttk.Label(edit_window, text="Connected Device:").pack(pady=5)
-        device_entry = ttk.Entry(edit_window)
-        device_entry.insert(0, connected_device)
-        device_entry.pack(pady=5)
-
-        ttk.Label(edit_window, text="Connected Port:").pack(pady=5)
-        port_entry = ttk.Entry(edit_window)
-        port_entry.insert(0, connected_port)
-        port_entry.pack(pady=5)
+        ttk.Label(edit_window, text="Connected To:").pack(pady=5)
+        connection_entry = ttk.Entry(edit_window)
+        connection_entry.insert(0, ports.connected_to(port_index) or "")
+        connection_entry.pack(pady=5)
 
         # Additional options for PoE, VLAN, etc.
         options_frame = ttk.Frame(edit_window)
         options_frame.pack(pady=10)
 
         # Define BooleanVars to store the state of the checkboxes
-        self.poe_var = tk.BooleanVar(value=poe)  # Initialize with the current value
-        self.vlan_var = tk.BooleanVar(value=vlan)  # Initialize with the current value
-        self.sfp_var = tk.BooleanVar(value=sfp)  # Initialize with the current value
+        self.poe_var = tk.BooleanVar(value=ports.has(port_index, POE))  # Initialize with the current value
+        self.vlan_var = tk.BooleanVar(value=ports.has(port_index, VLAN))  # Initialize with the current value
+        self.sfp_var = tk.BooleanVar(value=ports.has(port_index, SFP))  # Initialize with the current value
 
         # Create checkbuttons with the associated BooleanVars
         poe_check = ttk.Checkbutton(options_frame, text="PoE", variable=self.poe_var)
@@ -268,53 +490,79 @@ class NetworkInventoryApp:
 
         # Save button to update the connection details
         def save_details():
-            new_device = device_entry.get()
-            new_port = port_entry.get()
+            # Write the edit back to the inventory itself, not just the table row, as one undo step
+            flags = ports.flags[port_index] & ~(POE | VLAN | SFP)
+            flags |= (POE if self.poe_var.get() else 0) | (VLAN if self.vlan_var.get() else 0)
+            flags |= SFP if self.sfp_var.get() else 0
+            connected_to = connection_entry.get()
+            edit_window.destroy()
+
+            # Updates the search index and graph; only the edited rows are re-rendered
+            self.inventory_manager.set_port(device_index, port_index, connected_to, flags)
 
-            # Get the values of the checkboxes from the associated BooleanVars
-            poe = self.poe_var.get()  # Get the value of PoE checkbox
-            vlan = self.vlan_var.get()  # Get the value of VLAN checkbox
-            sfp = self.sfp_var.get()  # Get the value of SFP checkbox
+        def trace_cable():
+            # Show the whole circuit this port belongs to, through any patch panels
+            path = self.inventory_manager.graph.trace(Endpoint(device.name, port_index))
+            messagebox.showinfo("Trace Cable", " -> ".join(str(endpoint) for endpoint in path), parent=edit_window)
 
-            # Update the table with the new port details, including the checkbox values
-            self.port_mapping_table.item(selected_item, values=(port_number, new_device, new_port, "Yes" if poe else "No", "Yes" if vlan else "No", sfp))
+        def assign_connection():
             edit_window.destroy()
-            
-            # update treeview
-            self.refresh_cable_management()
+            self.inventory_manager.connection_helper(device_index, port_index)
 
-        save_button = ttk.Button(edit_window, text="Save", command=save_details)
-        save_button.pack(pady=10)
+        button_frame = ttk.Frame(edit_window)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="Save", command=save_details).pack(side="left", padx=2)
+        ttk.Button(button_frame, text="Trace Cable", command=trace_cable).pack(side="left", padx=2)
+        ttk.Button(button_frame, text="Assign...", command=assign_connection).pack(side="left", padx=2)
 
     def create_cable_management_view(self):
-        # Create a Treeview for cable management
+        # Create a Treeview for cable management; rows are rendered on demand by a VirtualTable
+        cable_management_container = ttk.Frame(self.port_mapping_frame)
+        cable_management_container.pack(fill="both", expand=True)
         self.cable_management_table = ttk.Treeview(
-            self.port_mapping_frame, columns=("Device", "Port", "Connected To"), show="headings"
+            cable_management_container, columns=("Device", "Port", "Connected To"), show="headings"
         )
         self.cable_management_table.heading("Device", text="Device")
         self.cable_management_table.heading("Port", text="Port")
         self.cable_management_table.heading("Connected To", text="Connected To")
-        self.cable_management_table.pack(fill="both", expand=True)
+        cable_management_scrollbar = ttk.Scrollbar(cable_management_container, orient="vertical")
+        self.cable_management_table.pack(side="left", fill="both", expand=True)
+        cable_management_scrollbar.pack(side="right", fill="y")
+        self.cable_management_view = VirtualTable(
+            self.cable_management_table,
+            PortRowModel(lambda: self.inventory_manager.devices, cable_management_row),
+            cable_management_scrollbar,
+        )
 
     def refresh_cable_management(self):
-        # Clear the existing rows in the Treeview
-        self.cable_management_table.delete(*self.cable_management_table.get_children())
-        
-        # Populate the Treeview with device and port connections
-        for device in self.inventory_manager.devices:
-            for port_index, port in enumerate(device["ports"]):
-                self.cable_management_table.insert(
-                    "", "end",
-                    values=(
-                        device["name"],
-                        f"Port {port_index + 1}",
-                        port["connected_to"] or "Unconnected"
-                    )
-                )
+        # Re-layout the rows on the next idle; only the visible window is (re)rendered
+        self.redraw.invalidate_layout(self.cable_management_view)
+
+
+def probe_startup(root, path):
+    # For benchmarks/startup.py: once the main window is mapped and has drawn,
+    # write the time since STARTED to path and quit. A file rather than stdout,
+    # since the windowed build has no console.
+    def mapped(event):
+        if event.widget is root:
+            root.unbind("<Map>", binding)
+            root.after_idle(finish)
+
+    def finish():
+        import json
+        with open(path, "w") as file:
+            json.dump({"first_window_ms": (time.perf_counter() - STARTED) * 1000}, file)
+        root.quit()
+
+    binding = root.bind("<Map>", mapped, add="+")
 
 
 # Main application execution
 if __name__ == "__main__":
     root = tk.Tk()
     app = NetworkInventoryApp(root)
+    if os.environ.get("PYRACK_STARTUP_PROBE"):
+        probe_startup(root, os.environ["PYRACK_STARTUP_PROBE"])
     root.mainloop()
+    app.autosave.stop()  # Unsaved edits stay in the journal for the next start
+    app.autosave.release()
@@ -0,0 +1,64 @@
+# -*- mode: python ; coding: utf-8 -*-
+#
+# Startup-optimized GUI build: pyinstaller main_onedir.spec
+#
+# Unlike main.spec (a single console exe), this builds a windowed app into
+# dist/pyrack/, so nothing is unpacked to a temporary directory on each launch.
+# UPX is off because decompressing the DLLs at load time costs more than it
+# saves, bytecode is compiled with -OO, and modules pyRack never imports are
+# left out. Measure the result with:
+#
+#     python benchmarks/startup.py --exe dist/pyrack/pyrack.exe
+
+EXCLUDES = [
+    # Test, documentation and debugging tools
+    'unittest', 'doctest', 'pydoc', 'pydoc_data', 'pdb', 'lib2to3', 'distutils',
+    'setuptools', 'pip', 'test', 'idlelib', 'turtle', 'turtledemo',
+    # Networking and process pools; pyRack only uses files and threads
+    'asyncio', 'multiprocessing', 'http', 'xmlrpc', 'email', 'ssl', 'socketserver', 'ftplib',
+    # Optional: analytics.py falls back to array/bytes passes without it. To
+    # bundle it, drop it from this list and lower optimize to 1.
+    'numpy',
+]
+
+a = Analysis(
+    ['main.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=EXCLUDES,
+    noarchive=False,
+    optimize=2,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='pyrack',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='pyrack',
+)
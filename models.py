@@ -0,0 +1,186 @@
+# models.py
+
+from array import array
+
+# Per-port option flags, stored as bits in PortTable.flags
+POE = 0x01
+VLAN = 0x02
+SFP = 0x04
+
+# JSON option names and their flag bits; PoE and VLAN are always written
+OPTION_FLAGS = {"PoE": POE, "VLAN": VLAN, "SFP": SFP}
+ALWAYS_SAVED_OPTIONS = ("PoE", "VLAN")
+
+# Shown as the site or rack of devices that have none
+UNASSIGNED = "Unassigned"
+
+
+class InternTable:
+    # Maps connection target strings to small integer ids so every port that
+    # points at the same target shares one string. Id 0 means "not connected".
+    # Not thread-safe: each inventory (and each file or page read on a worker)
+    # has its own, which goes away with its devices.
+    __slots__ = ("strings", "ids")
+
+    def __init__(self):
+        self.strings = [None]
+        self.ids = {}
+
+    def intern(self, value):
+        if not value:
+            return 0
+        target_id = self.ids.get(value)
+        if target_id is None:
+            target_id = len(self.strings)
+            self.strings.append(value)
+            self.ids[value] = target_id
+        return target_id
+
+    def lookup(self, target_id):
+        return self.strings[target_id]
+
+
+class PortTable:
+    # Column storage for a device's ports: one byte of option flags and one
+    # interned connection id per port, instead of two dicts per port. Devices
+    # read or built together pass one InternTable; otherwise each gets its own.
+    __slots__ = ("flags", "targets", "strings")
+
+    def __init__(self, count=0, strings=None):
+        self.flags = array("B", bytes(count))
+        self.targets = array("I", [0]) * count
+        self.strings = strings if strings is not None else InternTable()
+
+    def __len__(self):
+        return len(self.flags)
+
+    def connected_to(self, index):
+        return self.strings.lookup(self.targets[index])
+
+    def set_connected_to(self, index, value):
+        self.targets[index] = self.strings.intern(value)
+
+    def has(self, index, flag):
+        return bool(self.flags[index] & flag)
+
+    def set_flag(self, index, flag, enabled):
+        if enabled:
+            self.flags[index] |= flag
+        else:
+            self.flags[index] &= ~flag & 0xFF
+
+    def options(self, index):
+        # Option dict in the JSON layout, e.g. {"PoE": False, "VLAN": True}
+        flags = self.flags[index]
+        options = {name: bool(flags & OPTION_FLAGS[name]) for name in ALWAYS_SAVED_OPTIONS}
+        for name, flag in OPTION_FLAGS.items():
+            if name not in options and flags & flag:
+                options[name] = True
+        return options
+
+    def use_strings(self, strings):
+        # Re-intern the connections into another InternTable, e.g. an inventory's
+        if strings is self.strings:
+            return
+        lookup, intern = self.strings.lookup, strings.intern
+        ids = {target_id: intern(lookup(target_id)) for target_id in set(self.targets)}
+        self.targets = array("I", [ids[target_id] for target_id in self.targets])
+        self.strings = strings
+
+    def connection_targets(self):
+        # Distinct connection strings used by this device's ports
+        return {self.strings.lookup(target_id) for target_id in set(self.targets) if target_id}
+
+    def to_list(self):
+        return [
+            {"connected_to": self.connected_to(i), "options": self.options(i)}
+            for i in range(len(self))
+        ]
+
+    @classmethod
+    def from_list(cls, ports, strings=None):
+        # Checks each port while reading it and raises ValueError for a bad one.
+        # A missing connected_to or options, or a missing option (e.g. SFP in
+        # older files), means not connected / off; unknown options are ignored.
+        if not isinstance(ports, list):
+            raise ValueError(f"'ports' must be a list, not {type(ports).__name__}")
+        table = cls(len(ports), strings)
+        intern = table.strings.intern
+        for i, port in enumerate(ports):
+            if not isinstance(port, dict):
+                raise ValueError(f"port {i + 1} must be an object, not {type(port).__name__}")
+            connected_to = port.get("connected_to")
+            if connected_to is not None and not isinstance(connected_to, str):
+                raise ValueError(f"port {i + 1}: 'connected_to' must be text or null")
+            table.targets[i] = intern(connected_to)
+            options = port.get("options")
+            if not options:
+                continue
+            if not isinstance(options, dict):
+                raise ValueError(f"port {i + 1}: 'options' must be an object")
+            flags = 0
+            for name, enabled in options.items():
+                if enabled is not None and not isinstance(enabled, (bool, int)):
+                    raise ValueError(f"port {i + 1}: option {name!r} must be true or false")
+                if enabled:
+                    flags |= OPTION_FLAGS.get(name, 0)
+            table.flags[i] = flags
+        return table
+
+
+class Device:
+    __slots__ = ("type", "name", "ports", "site", "rack", "store_id")
+
+    def __init__(self, device_type, name, port_count=0, site=None, rack=None, strings=None):
+        self.type = device_type
+        self.name = name
+        self.ports = PortTable(port_count, strings)
+        self.site = site  # None when not placed; see location()
+        self.rack = rack
+        self.store_id = None  # Row id once the device has been written to a SQLiteStore
+
+    def __repr__(self):
+        return f"Device({self.type!r}, {self.name!r}, ports={len(self.ports)})"
+
+    def to_dict(self):
+        # JSON layout used by inventory files; site and rack only when set
+        data = {"type": self.type, "name": self.name}
+        if self.site:
+            data["site"] = self.site
+        if self.rack:
+            data["rack"] = self.rack
+        data["ports"] = self.ports.to_list()
+        return data
+
+    @classmethod
+    def from_dict(cls, data, strings=None):
+        # Raises ValueError, naming the field or port, for anything that doesn't match to_dict()
+        if not isinstance(data, dict):
+            raise ValueError(f"a device must be an object, not {type(data).__name__}")
+        for key in ("type", "name"):
+            if not isinstance(data.get(key), str) or not data[key]:
+                raise ValueError(f"missing or empty {key!r}")
+        for key in ("site", "rack"):
+            if data.get(key) is not None and not isinstance(data[key], str):
+                raise ValueError(f"{key!r} must be a string")
+        device = cls(data["type"], data["name"], site=data.get("site") or None, rack=data.get("rack") or None,
+                     strings=strings)
+        device.ports = PortTable.from_list(data.get("ports"), device.ports.strings)
+        return device
+
+
+def location(device):
+    # (site, rack) to group a device under, with UNASSIGNED for what is not set
+    return device.site or UNASSIGNED, device.rack or UNASSIGNED
+
+
+def parse_location_name(name):
+    # (site, rack) suggested by a "SITE-RACK-DEVICE" name such as "S01-R004-SW02",
+    # (site, None) for "SITE-DEVICE", else (None, None). Only used when the user
+    # asks to fill in locations from names; nothing is filed by name otherwise.
+    parts = name.split("-")
+    if len(parts) >= 3:
+        return parts[0], parts[1]
+    if len(parts) == 2:
+        return parts[0], None
+    return None, None
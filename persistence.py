@@ -0,0 +1,262 @@
+# persistence.py
+
+import codecs
+import json
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+
+from models import Device, InternTable
+
+# Bytes read from disk per step while streaming an inventory file
+READ_CHUNK_SIZE = 1 << 16
+# Bumped whenever the cache layout changes; older caches are ignored
+CACHE_VERSION = 2
+
+# Read once: os.umask can only be read by setting it, which would race with
+# worker threads creating files
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def set_new_file_mode(temp_path, path):
+    # mkstemp files are 0600; give the file that will replace path the mode
+    # path already has, or the mode open() would have given a new file
+    if os.path.exists(path):
+        shutil.copymode(path, temp_path)
+    else:
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+
+
+def iter_device_dicts(path, progress=None):
+    # Stream the top-level JSON array of an inventory file, yielding one device
+    # dict at a time so only the current device is ever held in memory.
+    # progress, if given, is called with the fraction of the file read so far.
+    total = os.path.getsize(path) or 1
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    bytes_read = 0
+    buffer = ""
+    pos = 0
+    # What may come next: "[" to open the list, the "first" device or "]",
+    # a "device" after a comma, a "separator" ("," or "]"), or only whitespace at the "end"
+    expect = "["
+    count = 0
+
+    with open(path, "rb") as file:
+        eof = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+
+            if pos < len(buffer):
+                char = buffer[pos]
+                if expect == "[":
+                    if char != "[":
+                        raise ValueError(f"{path}: inventory file must contain a JSON list of devices")
+                    expect = "first"
+                    pos += 1
+                    continue
+                if expect == "end":
+                    raise ValueError(f"{path}: unexpected data after the list of devices")
+                if expect == "separator" or (expect == "first" and char == "]"):
+                    if char == "]":
+                        expect = "end"
+                    elif char == ",":
+                        expect = "device"
+                    else:
+                        raise ValueError(f"{path}: expected ',' or ']' after device {count}")
+                    pos += 1
+                    continue
+                if char in ",]":
+                    raise ValueError(f"{path}: expected device {count + 1}, found {char!r}")
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # The device is split across chunks; read more unless there is none
+                    if eof:
+                        raise
+                else:
+                    pos = end
+                    count += 1
+                    expect = "separator"
+                    yield value
+                    continue
+            elif eof:
+                if expect == "end":
+                    return
+                raise ValueError(f"{path}: unexpected end of inventory file")
+
+            # Drop what has been consumed and pull in the next chunk
+            chunk = file.read(READ_CHUNK_SIZE)
+            bytes_read += len(chunk)
+            eof = not chunk
+            buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+            if progress is not None:
+                progress(bytes_read / total)
+
+
+def iter_devices(path, progress=None, strings=None):
+    # Devices from an inventory file, checked one at a time; a bad entry raises
+    # ValueError naming the file and the device. Their connections share strings,
+    # by default a new InternTable for this file.
+    strings = strings if strings is not None else InternTable()
+    for index, data in enumerate(iter_device_dicts(path, progress)):
+        try:
+            yield Device.from_dict(data, strings)
+        except ValueError as error:
+            name = data.get("name") if isinstance(data, dict) else None
+            label = f"device {index + 1}" + (f" ({name})" if isinstance(name, str) and name else "")
+            raise ValueError(f"{path}: {label}: {error}") from None
+
+
+def load_devices(path, progress=None, cache=False, strings=None):
+    # With cache, an unchanged file is read back from its binary cache instead of
+    # being parsed, and a parsed file gets a fresh cache
+    strings = strings if strings is not None else InternTable()
+    if not cache:
+        return list(iter_devices(path, progress, strings))
+    stat = os.stat(path)
+    devices = read_cache(path, stat, strings)
+    if devices is None:
+        devices = list(iter_devices(path, progress, strings))
+        write_cache(path, devices, stat)
+    elif progress is not None:
+        progress(1.0)
+    return devices
+
+
+def cache_path(path):
+    # Hidden file next to the inventory, e.g. .rack.json.cache
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.cache")
+
+
+def _cache_key(stat):
+    # The cache is valid only for this exact file, on this Python and byte order
+    return (CACHE_VERSION, marshal.version, sys.byteorder, stat.st_mtime_ns, stat.st_size)
+
+
+def write_cache(path, devices, stat):
+    # Store devices, as parsed from path when it had this os.stat(), in a few
+    # large columns that marshal reads back quickly: the connection strings they
+    # use, device types, names, sites and racks, port counts, and every port's
+    # flags and target (an index into those strings). Best effort: a directory
+    # we can't write to just means no cache.
+    strings = [""]
+    local_ids = {}  # Connection string -> index in strings
+    types, names, sites, racks = [], [], [], []
+    port_counts, flags, targets = array("I"), [], array("I")
+    for device in devices:
+        ports = device.ports
+        # Devices may intern into different tables, so ids map per device
+        device_ids = {0: 0}
+        for target_id in set(ports.targets):
+            if target_id:
+                value = ports.strings.lookup(target_id)
+                if value not in local_ids:
+                    local_ids[value] = len(strings)
+                    strings.append(value)
+                device_ids[target_id] = local_ids[value]
+        types.append(device.type)
+        names.append(device.name)
+        sites.append(device.site or "")
+        racks.append(device.rack or "")
+        port_counts.append(len(ports))
+        flags.append(ports.flags.tobytes())
+        targets.extend([device_ids[t] for t in ports.targets])
+    columns = (strings, types, names, sites, racks)
+    if any("\0" in value for column in columns for value in column):
+        return  # Can't be stored NUL-joined; such a file is just parsed every time
+    data = marshal.dumps((
+        _cache_key(stat),
+        *("\0".join(column) for column in columns),
+        port_counts.tobytes(), b"".join(flags), targets.tobytes(),
+    ))
+
+    target = cache_path(path)
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(target))
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        set_new_file_mode(temp_path, target)
+        os.replace(temp_path, target)
+    except OSError:
+        os.unlink(temp_path)
+
+
+def read_cache(path, stat, strings=None):
+    # Devices from path's cache, or None if there is none or it is stale or
+    # unreadable. Their connections are interned into strings, or a new InternTable.
+    try:
+        with open(cache_path(path), "rb") as file:
+            key, values, types, names, sites, racks, port_counts, flags, targets = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if key != _cache_key(stat):
+        return None
+
+    strings = strings if strings is not None else InternTable()
+    intern = strings.intern
+    global_ids = [intern(value) for value in values.split("\0")]  # "" interns to 0
+    counts = array("I")
+    counts.frombytes(port_counts)
+    local = array("I")
+    local.frombytes(targets)
+    targets = array("I", [global_ids[t] for t in local])
+
+    devices = []
+    start = 0
+    columns = zip(types.split("\0"), names.split("\0"), sites.split("\0"), racks.split("\0"), counts)
+    for device_type, name, site, rack, count in columns:
+        device = Device(device_type, name, site=site or None, rack=rack or None, strings=strings)
+        end = start + count
+        device.ports.flags.frombytes(flags[start:end])
+        device.ports.targets = targets[start:end]
+        devices.append(device)
+        start = end
+    return devices
+
+
+def save_devices(path, devices, compact=False, progress=None, total=None):
+    # Write devices one at a time to a temporary file next to the target, then
+    # atomically rename it over the target so a crash never leaves a partial file.
+    # compact drops the indentation; otherwise the output matches json.dump(..., indent=4).
+    # devices may be any iterable; pass total for progress when it has no len().
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    total = (total if total is not None else len(devices)) or 1
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            separator = "," if compact else ",\n    "
+            file.write("[")
+
+            for count, device in enumerate(devices, start=1):
+                file.write(separator if count > 1 else "" if compact else "\n    ")
+                if compact:
+                    file.write(json.dumps(device.to_dict(), separators=(",", ":")))
+                else:
+                    file.write(json.dumps(device.to_dict(), indent=4).replace("\n", "\n    "))
+                if progress is not None and count % 100 == 0:
+                    progress(count / total)
+
+            file.write("\n]" if count and not compact else "]")
+            file.flush()
+            os.fsync(file.fileno())
+        set_new_file_mode(temp_path, path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    if progress is not None:
+        progress(1.0)
+
@@ -0,0 +1,113 @@
+# port_editor.py
+
+import tkinter as tk
+from tkinter import ttk
+
+from models import POE, VLAN
+from profiling import PROFILER
+
+# Number of port rows built; the same widgets are re-filled while scrolling
+PORT_EDITOR_ROWS = 12
+
+
+class PortEditor:
+    # Editable, windowed view of one device's ports. Only PORT_EDITOR_ROWS rows
+    # of widgets exist no matter how many ports the device has. Edits are kept
+    # in self.edits (port index -> (connected_to, flags)) until they are saved,
+    # and only ports whose values really differ end up there.
+    def __init__(self, master, ports, rows=PORT_EDITOR_ROWS):
+        self.ports = ports
+        self.first = 0  # Port index shown in the top row
+        self.visible = min(rows, len(ports))
+        self.edits = {}
+
+        self.frame = ttk.Frame(master)
+        headers = ["Port", "Connected To", "PoE", "VLAN"]
+        for col, text in enumerate(headers):
+            header_label = ttk.Label(self.frame, text=text, font=("Arial", 10, "bold"))
+            header_label.grid(row=0, column=col, padx=5, pady=5)
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=1, column=4, rowspan=max(1, self.visible), sticky="ns")
+
+        # The widget pool: (label, connection_var, poe_var, vlan_var) per row
+        self._slots = []
+        for slot in range(self.visible):
+            port_label = ttk.Label(self.frame, width=9)
+            port_label.grid(row=slot + 1, column=0, padx=5, pady=2)
+            connection_var = tk.StringVar()
+            connection_entry = ttk.Entry(self.frame, textvariable=connection_var, width=20)
+            connection_entry.grid(row=slot + 1, column=1, padx=5, pady=2)
+            poe_var = tk.BooleanVar()
+            poe_check = ttk.Checkbutton(self.frame, text="PoE", variable=poe_var)
+            poe_check.grid(row=slot + 1, column=2, padx=5, pady=2)
+            vlan_var = tk.BooleanVar()
+            vlan_check = ttk.Checkbutton(self.frame, text="VLAN", variable=vlan_var)
+            vlan_check.grid(row=slot + 1, column=3, padx=5, pady=2)
+            for widget in (self.frame, port_label, connection_entry, poe_check, vlan_check):
+                widget.bind("<MouseWheel>", self._on_mousewheel)
+                widget.bind("<Button-4>", lambda e: self.scroll(-3))
+                widget.bind("<Button-5>", lambda e: self.scroll(3))
+            self._slots.append((port_label, connection_var, poe_var, vlan_var))
+        PROFILER.count("port_editor.widgets_created", 4 * self.visible)
+
+        self._render()
+
+    def changes(self):
+        # {port index: (connected_to, flags)} for every port that was edited
+        self._store()
+        return dict(self.edits)
+
+    def scroll(self, delta):
+        self._store()
+        self.first += delta
+        self._clamp()
+        self._render()
+
+    def yview(self, *args):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" | "pages")
+        self._store()
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.ports))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self._clamp()
+        self._render()
+
+    def _value(self, port_index):
+        # What the port currently holds, including unsaved edits
+        if port_index in self.edits:
+            return self.edits[port_index]
+        return self.ports.connected_to(port_index), self.ports.flags[port_index]
+
+    def _clamp(self):
+        self.first = max(0, min(self.first, len(self.ports) - self.visible))
+
+    def _render(self):
+        for slot, (port_label, connection_var, poe_var, vlan_var) in enumerate(self._slots):
+            port_index = self.first + slot
+            connected_to, flags = self._value(port_index)
+            port_label.configure(text=f"Port {port_index + 1}")
+            connection_var.set(connected_to or "")
+            poe_var.set(bool(flags & POE))
+            vlan_var.set(bool(flags & VLAN))
+        total = len(self.ports)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible) / total))
+
+    def _store(self):
+        # Pull the shown rows back out of their widgets before they are re-filled
+        for slot, (port_label, connection_var, poe_var, vlan_var) in enumerate(self._slots):
+            port_index = self.first + slot
+            original = (self.ports.connected_to(port_index), self.ports.flags[port_index])
+            flags = original[1] & ~(POE | VLAN)  # Flags this editor doesn't show are kept
+            flags |= (POE if poe_var.get() else 0) | (VLAN if vlan_var.get() else 0)
+            value = (connection_var.get() or None, flags)
+            if value != original:
+                self.edits[port_index] = value
+            else:
+                self.edits.pop(port_index, None)
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
@@ -0,0 +1,117 @@
+# profiling.py
+#
+# Opt-in instrumentation: named timing spans and counters for the hot paths,
+# plus a cProfile of the Tk thread. Off unless PYRACK_PROFILE is set (or it is
+# switched on from the Help menu); when off, span() and count() are no-ops.
+#
+#     with PROFILER.span("load_inventory.read"):
+#         ...
+#     PROFILER.count("treeview.items_created", 30)
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+_DISABLED_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = False
+        self.spans = {}     # Name -> [count, total seconds, max seconds]
+        self.counters = {}  # Name -> count
+        self._lock = threading.Lock()  # Spans are also recorded from worker threads
+        self._profile = None
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        # Also starts or stops the cProfile of the calling (Tk) thread
+        if enabled and not self.enabled:
+            if self._profile is None:
+                import cProfile  # Only when profiling is actually switched on
+                self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif not enabled and self.enabled:
+            self._profile.disable()
+        self.enabled = enabled
+
+    def span(self, name):
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def wrap(self, name, func):
+        # func with every call timed as a span; for work handed to a worker thread
+        def timed(*args, **kwargs):
+            with self.span(name):
+                return func(*args, **kwargs)
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = type(self._profile)()
+            if self.enabled:
+                self._profile.enable()
+
+    def snapshot(self):
+        with self._lock:
+            spans = {
+                name: {"count": count, "total_ms": total * 1000, "mean_ms": total * 1000 / count, "max_ms": peak * 1000}
+                for name, (count, total, peak) in self.spans.items()
+            }
+            return {"spans": spans, "counters": dict(self.counters)}
+
+    def dump_json(self, path):
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=4)
+
+    def dump_cprofile(self, path):
+        # pstats format; read it with python -m pstats or snakeviz
+        if self._profile is None:
+            raise ValueError("No profile has been recorded; enable profiling first.")
+        self._profile.disable()
+        try:
+            self._profile.dump_stats(path)
+        finally:
+            if self.enabled:
+                self._profile.enable()
+
+
+PROFILER = Profiler(enabled=os.environ.get("PYRACK_PROFILE", "") not in ("", "0"))
@@ -0,0 +1,134 @@
+# provision_dialog.py
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from core import DEVICE_TYPES
+from templates import DeviceTemplate
+
+# Names shown in the preview before it is cut short
+PREVIEW_NAMES = 3
+
+
+class ProvisionDialog:
+    # Pick or edit a device template, then add count devices made from it in
+    # one go. Templates can be saved to (or deleted from) the library here too.
+    # on_provision(template, count, start, site, rack) does the adding; a
+    # ValueError from it is shown and the dialog stays open.
+    def __init__(self, master, library, on_provision):
+        self.library = library
+        self.on_provision = on_provision
+
+        self.window = tk.Toplevel(master)
+        self.window.title("Provision Devices")
+        self.window.resizable(False, False)
+
+        self.name_var = tk.StringVar()
+        self.type_var = tk.StringVar()
+        self.ports_var = tk.StringVar()
+        self.pattern_var = tk.StringVar()
+        self.profile_var = tk.StringVar()
+        self.count_var = tk.StringVar(value="1")
+        self.start_var = tk.StringVar(value="1")
+        self.site_var = tk.StringVar()
+        self.rack_var = tk.StringVar()
+        self.preview_var = tk.StringVar()
+
+        form = ttk.Frame(self.window, padding=10)
+        form.pack(fill="both", expand=True)
+        self.template_box = ttk.Combobox(form, textvariable=self.name_var, values=library.names(), width=30)
+        self.template_box.bind("<<ComboboxSelected>>", lambda e: self.show_template(self.name_var.get()))
+        fields = [
+            ("Template", self.template_box),
+            ("Device Type", ttk.Combobox(form, textvariable=self.type_var, values=list(DEVICE_TYPES), state="readonly")),
+            ("Ports", ttk.Spinbox(form, textvariable=self.ports_var, from_=0, to=10000, width=8)),
+            ("Naming Pattern", ttk.Entry(form, textvariable=self.pattern_var, width=32)),
+            ("Port Profile", ttk.Entry(form, textvariable=self.profile_var, width=32)),
+            ("Count", ttk.Spinbox(form, textvariable=self.count_var, from_=1, to=10000, width=8)),
+            ("First {n}", ttk.Spinbox(form, textvariable=self.start_var, from_=0, to=100000, width=8)),
+            ("Site", ttk.Entry(form, textvariable=self.site_var, width=16)),
+            ("Rack", ttk.Entry(form, textvariable=self.rack_var, width=16)),
+        ]
+        for row, (label, widget) in enumerate(fields):
+            ttk.Label(form, text=label).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+            widget.grid(row=row, column=1, sticky="w", padx=5, pady=2)
+        ttk.Label(form, text="Profile example: 1-44: PoE VLAN; 45-48: SFP", foreground="gray").grid(
+            row=len(fields), column=1, sticky="w", padx=5)
+        ttk.Label(form, textvariable=self.preview_var, wraplength=320).grid(
+            row=len(fields) + 1, column=0, columnspan=2, sticky="w", padx=5, pady=(8, 2))
+
+        buttons = ttk.Frame(self.window, padding=(10, 0, 10, 10))
+        buttons.pack(fill="x")
+        ttk.Button(buttons, text="Save Template", command=self.save_template).pack(side="left", padx=2)
+        ttk.Button(buttons, text="Delete Template", command=self.delete_template).pack(side="left", padx=2)
+        ttk.Button(buttons, text="Cancel", command=self.window.destroy).pack(side="right", padx=2)
+        ttk.Button(buttons, text="Provision", command=self.provision).pack(side="right", padx=2)
+
+        for var in (self.type_var, self.ports_var, self.pattern_var, self.profile_var, self.count_var, self.start_var):
+            var.trace_add("write", lambda *args: self.update_preview())
+        self.show_template(library.names()[0])
+
+    def show_template(self, name):
+        template = self.library[name]
+        self.name_var.set(template.name)
+        self.type_var.set(template.device_type)
+        self.ports_var.set(str(template.port_count))
+        self.pattern_var.set(template.pattern)
+        self.profile_var.set(template.profile)
+
+    def template(self):
+        # The template described by the form; raises ValueError if it is invalid
+        name = self.name_var.get().strip()
+        if not name:
+            raise ValueError("Template name cannot be empty.")
+        return DeviceTemplate(name, self.type_var.get(), _number(self.ports_var, "Ports"),
+                              self.pattern_var.get(), self.profile_var.get())
+
+    def update_preview(self):
+        try:
+            count = _number(self.count_var, "Count")
+            names = self.template().names(count, _number(self.start_var, "First {n}"))
+        except ValueError as error:
+            self.preview_var.set(str(error))
+            return
+        shown = ", ".join(names[:PREVIEW_NAMES])
+        if len(names) > PREVIEW_NAMES:
+            shown += f", ... {names[-1]}"
+        self.preview_var.set(f"{count} device(s): {shown}")
+
+    def save_template(self):
+        try:
+            self.library.set(self.template())
+            self.library.save()
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Save Template", str(error), parent=self.window)
+            return
+        self.template_box.configure(values=self.library.names())
+
+    def delete_template(self):
+        name = self.name_var.get().strip()
+        if name not in self.library.templates:
+            return
+        self.library.remove(name)
+        try:
+            self.library.save()
+        except OSError as error:
+            messagebox.showerror("Delete Template", str(error), parent=self.window)
+        self.template_box.configure(values=self.library.names())
+        self.show_template(name if name in self.library.templates else self.library.names()[0])
+
+    def provision(self):
+        try:
+            self.on_provision(self.template(), _number(self.count_var, "Count"), _number(self.start_var, "First {n}"),
+                              self.site_var.get().strip(), self.rack_var.get().strip())
+        except ValueError as error:
+            messagebox.showerror("Provision Devices", str(error), parent=self.window)
+            return
+        self.window.destroy()
+
+
+def _number(var, label):
+    try:
+        return int(var.get())
+    except ValueError:
+        raise ValueError(f"{label} must be a whole number.") from None
@@ -0,0 +1,261 @@
+# pyrack.py
+#
+# Command-line entry point for scripting the inventory without the GUI:
+#
+#     python pyrack.py add rack.json Switch "Access SW {n:02d}" --count 40
+#     python pyrack.py load rack.json
+#     python pyrack.py export rack.json rack.csv --type "Patch Panel"
+#     python pyrack.py import rack.json spreadsheet.csv
+#     python pyrack.py query rack.json "core"
+#     python pyrack.py trace rack.json "Core Switch Port 3"
+#     python pyrack.py generate big.json --sites 4 --racks 50
+#     python pyrack.py report big.json --by rack --output usage.csv
+#     python pyrack.py template "Access 48" Switch --ports 48 --pattern "S01-R{n:03d}-SW01" --profile "1-44: PoE"
+#     python pyrack.py provision rack.json "Access 48" --count 40 --site S01 --rack R001
+#     python pyrack.py locate rack.json "S01-R004-SW02" --site S01 --rack R004
+#     python pyrack.py locate rack.json --from-names
+#
+# Inventories ending in .db or .sqlite use the SQLite backend, *.manifest.json
+# names a sharded inventory (see shards.py), and anything else is JSON.
+# Only core modules are imported, so Tk is never loaded.
+
+import argparse
+import os
+import sys
+
+from core import DEVICE_TYPES, Inventory
+from csv_io import ImportReport
+from generator import RACKS_PER_SITE, generate_inventory
+from models import parse_location_name
+from templates import DeviceTemplate, TemplateLibrary
+
+
+def open_inventory(path, create=False):
+    if create and not os.path.exists(path):
+        return Inventory()
+    return Inventory.open(path)
+
+
+def command_add(args):
+    # The name is used as a one-off template's naming pattern, so it is checked
+    # like provision's: bad patterns, duplicates and names already taken are errors
+    template = DeviceTemplate(args.type, args.type, args.ports, args.name)
+    inventory = open_inventory(args.inventory, create=True)
+    devices = inventory.provision(template, args.count, args.start, args.site, args.rack)
+    inventory.save(args.inventory, compact=args.compact)
+    print(f"Added {len(devices)} {args.type} device(s) to {args.inventory}.")
+
+
+def command_load(args):
+    inventory = open_inventory(args.inventory)
+    print(f"{args.inventory}: {len(inventory.devices)} devices, {inventory.port_count()} ports, "
+          f"{len(inventory.graph)} links")
+    if args.list:
+        for name, device_type in inventory.list_devices():
+            print(f"{name} ({device_type})")
+
+
+def command_export(args):
+    inventory = open_inventory(args.inventory)
+    inventory.export_csv(args.csv, device_types=set(args.type) if args.type else None)
+    print(f"Exported {args.inventory} to {args.csv}.")
+
+
+def command_import(args):
+    inventory = open_inventory(args.inventory, create=True)
+    report = ImportReport()
+    inventory.import_devices(Inventory.read_csv(args.csv, report), report)
+    inventory.save(args.inventory, compact=args.compact)
+    print(report.summary())
+    return 1 if report.skipped and args.strict else 0
+
+
+def command_query(args):
+    inventory = open_inventory(args.inventory)
+    for device_index in inventory.search(args.term):
+        device = inventory.devices[device_index]
+        print(f"{device.name} ({device.type})")
+
+
+def command_trace(args):
+    inventory = open_inventory(args.inventory)
+    print(" -> ".join(str(endpoint) for endpoint in inventory.trace(args.endpoint)))
+
+
+def command_generate(args):
+    inventory = Inventory()
+    inventory.add_devices(generate_inventory(args.sites, args.racks, args.seed))
+    inventory.save(args.inventory, compact=args.compact)
+    print(f"Generated {len(inventory.devices)} devices with {inventory.port_count()} ports in {args.inventory}.")
+
+
+def command_report(args):
+    # analytics may pull in NumPy, so it is imported only for this command
+    from analytics import export_report, format_report, utilization_report
+    inventory = open_inventory(args.inventory)
+    report = utilization_report(inventory.devices)
+    print(format_report(report, "by_" + args.by))
+    if args.output:
+        export_report(args.output, report)
+        print(f"Wrote the report to {args.output}.")
+
+
+def command_templates(args):
+    for template in TemplateLibrary(args.templates).templates.values():
+        profile = f", {template.profile}" if template.profile else ""
+        print(f"{template.name}: {template.port_count}-port {template.device_type}, {template.pattern}{profile}")
+
+
+def command_template(args):
+    library = TemplateLibrary(args.templates)
+    library.set(DeviceTemplate(args.name, args.type, args.ports, args.pattern, args.profile))
+    library.save()
+    print(f"Saved template {args.name!r} to {library.path}.")
+
+
+def command_provision(args):
+    template = TemplateLibrary(args.templates)[args.template]
+    if args.pattern:
+        template = DeviceTemplate(template.name, template.device_type, template.port_count, args.pattern,
+                                  template.profile)
+    inventory = open_inventory(args.inventory, create=True)
+    devices = inventory.provision(template, args.count, args.start, args.site, args.rack)
+    inventory.save(args.inventory, compact=args.compact)
+    print(f"Provisioned {len(devices)} devices ({devices[0].name} .. {devices[-1].name}) in {args.inventory}.")
+
+
+def command_locate(args):
+    # Set one device's site and rack, or with --from-names fill in those of
+    # every device that has neither from a SITE-RACK-DEVICE name
+    inventory = open_inventory(args.inventory)
+    if args.from_names:
+        if args.name or args.site or args.rack:
+            raise ValueError("--from-names takes no device name, --site or --rack")
+        located = 0
+        for device_index, device in enumerate(inventory.devices):
+            if device.site is None and device.rack is None:
+                site, rack = parse_location_name(device.name)
+                if site is not None:
+                    inventory.set_location(device_index, site, rack)
+                    located += 1
+        inventory.save(args.inventory, compact=args.compact)
+        print(f"Set the location of {located} device(s) in {args.inventory} from their names.")
+        return
+    if not args.name:
+        raise ValueError("a device name or --from-names is required")
+    device_index = inventory.find_device(args.name)
+    if device_index is None:
+        raise ValueError(f"No device named {args.name!r}")
+    inventory.set_location(device_index, args.site, args.rack)
+    inventory.save(args.inventory, compact=args.compact)
+    device = inventory.devices[device_index]
+    print(f"Moved {device.name} to site {device.site or '-'}, rack {device.rack or '-'}.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pyrack", description="Network rack inventory tool")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add one or more devices")
+    add.add_argument("inventory")
+    add.add_argument("type", choices=sorted(DEVICE_TYPES))
+    add.add_argument("name", help="device name; with --count, a pattern such as 'SW {n:02d}'")
+    add.add_argument("--count", type=int, default=1)
+    add.add_argument("--start", type=int, default=1, help="first {n} for --count (default 1)")
+    add.add_argument("--ports", type=int, help="port count (default: the type's)")
+    add.add_argument("--site", help="site of the new devices")
+    add.add_argument("--rack", help="rack of the new devices")
+    add.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    add.set_defaults(handler=command_add)
+
+    load = commands.add_parser("load", help="load an inventory and print a summary")
+    load.add_argument("inventory")
+    load.add_argument("--list", action="store_true", help="also list every device")
+    load.set_defaults(handler=command_load)
+
+    export = commands.add_parser("export", help="export to CSV")
+    export.add_argument("inventory")
+    export.add_argument("csv")
+    export.add_argument("--type", action="append", help="only this device type (repeatable)")
+    export.set_defaults(handler=command_export)
+
+    import_ = commands.add_parser("import", help="append devices from a CSV in the exported layout")
+    import_.add_argument("inventory")
+    import_.add_argument("csv")
+    import_.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    import_.add_argument("--strict", action="store_true", help="exit with status 1 if any row was skipped")
+    import_.set_defaults(handler=command_import)
+
+    query = commands.add_parser("query", help="search device names, types and connections")
+    query.add_argument("inventory")
+    query.add_argument("term")
+    query.set_defaults(handler=command_query)
+
+    trace = commands.add_parser("trace", help="trace a cable end to end, e.g. 'Core Switch Port 3'")
+    trace.add_argument("inventory")
+    trace.add_argument("endpoint")
+    trace.set_defaults(handler=command_trace)
+
+    generate = commands.add_parser("generate", help="write a synthetic inventory of whole sites and racks")
+    generate.add_argument("inventory")
+    generate.add_argument("--sites", type=int, default=1)
+    generate.add_argument("--racks", type=int, default=RACKS_PER_SITE, help="racks per site")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    generate.set_defaults(handler=command_generate)
+
+    report = commands.add_parser("report", help="port utilization, PoE budget and connection problems")
+    report.add_argument("inventory")
+    report.add_argument("--by", choices=["type", "rack"], default="type", help="group rows by device type or rack")
+    report.add_argument("--output", help="also write the full report to a .json or .csv file")
+    report.set_defaults(handler=command_report)
+
+    templates = commands.add_parser("templates", help="list device templates")
+    templates.add_argument("--templates", help="templates file (default ~/.pyrack/templates.json)")
+    templates.set_defaults(handler=command_templates)
+
+    template = commands.add_parser("template", help="create or replace a device template")
+    template.add_argument("name")
+    template.add_argument("type", choices=sorted(DEVICE_TYPES))
+    template.add_argument("--ports", type=int, help="port count (default: the type's)")
+    template.add_argument("--pattern", help="device names, e.g. 'S01-R{n:03d}-SW01' (default '<type> {n}')")
+    template.add_argument("--profile", default="", help="default port options, e.g. '1-44: PoE VLAN; 45-48: SFP'")
+    template.add_argument("--templates", help="templates file (default ~/.pyrack/templates.json)")
+    template.set_defaults(handler=command_template)
+
+    provision = commands.add_parser("provision", help="add a batch of devices from a template")
+    provision.add_argument("inventory")
+    provision.add_argument("template")
+    provision.add_argument("--count", type=int, required=True)
+    provision.add_argument("--start", type=int, default=1, help="first {n} (default 1)")
+    provision.add_argument("--pattern", help="naming pattern to use instead of the template's")
+    provision.add_argument("--site", help="site of the new devices")
+    provision.add_argument("--rack", help="rack of the new devices")
+    provision.add_argument("--templates", help="templates file (default ~/.pyrack/templates.json)")
+    provision.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    provision.set_defaults(handler=command_provision)
+
+    locate = commands.add_parser("locate", help="set the site and rack of a device")
+    locate.add_argument("inventory")
+    locate.add_argument("name", nargs="?", help="device name")
+    locate.add_argument("--site", help="site; omit to clear it")
+    locate.add_argument("--rack", help="rack; omit to clear it")
+    locate.add_argument("--from-names", action="store_true",
+                        help="set every unplaced device's site and rack from a SITE-RACK-DEVICE name")
+    locate.add_argument("--compact", action="store_true", help="write JSON without indentation")
+    locate.set_defaults(handler=command_locate)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args) or 0
+    except (OSError, ValueError) as error:
+        print(f"pyrack: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
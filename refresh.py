@@ -0,0 +1,100 @@
+# refresh.py
+
+import time
+
+from profiling import PROFILER
+
+
+class RefreshScheduler:
+    # Collects invalidations for a set of VirtualTables and applies them in one
+    # pass when Tk is next idle, so any number of edits between two frames cost
+    # a single redraw. A layout invalidation (rows added, removed or filtered)
+    # supersedes row-level ones for the same view.
+    def __init__(self, root, views):
+        self.root = root
+        self.views = list(views)
+        self._layout = set()  # Views whose row layout must be rebuilt
+        self._dirty = {}      # View -> {device_index: set of port indices, or None for all}
+        self._job = None
+
+        # Statistics
+        self.invalidations = 0
+        self.redraws = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def invalidate_layout(self, view=None):
+        for target in ([view] if view is not None else self.views):
+            self._layout.add(target)
+            self._dirty.pop(target, None)
+        self._schedule()
+
+    def invalidate_device(self, device_index, port_indices=None, view=None):
+        # Redraw a device's rows; port_indices narrows it to just those ports
+        for target in ([view] if view is not None else self.views):
+            if target in self._layout:
+                continue
+            devices = self._dirty.setdefault(target, {})
+            if port_indices is None:
+                devices[device_index] = None
+            elif device_index not in devices:
+                devices[device_index] = set(port_indices)
+            elif devices[device_index] is not None:
+                devices[device_index].update(port_indices)
+        self._schedule()
+
+    def flush(self):
+        # Apply everything pending now (normally called from after_idle)
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        if not self._layout and not self._dirty:
+            return
+
+        started = time.perf_counter()
+        layout, dirty = self._layout, self._dirty
+        self._layout, self._dirty = set(), {}
+        for view in layout:
+            with PROFILER.span("refresh.layout"):
+                view.refresh()
+        for view, devices in dirty.items():
+            with PROFILER.span("refresh.rows"):
+                view.update_rows(self._rows(view, devices))
+        elapsed = time.perf_counter() - started
+
+        self.redraws += 1
+        self.total_seconds += elapsed
+        self.last_seconds = elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self):
+        return {
+            "invalidations": self.invalidations,
+            "redraws": self.redraws,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds * 1000 / self.redraws if self.redraws else 0.0,
+            "last_ms": self.last_seconds * 1000,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+    def _schedule(self):
+        self.invalidations += 1
+        if self._job is None:
+            self._job = self.root.after_idle(self._run)
+
+    def _run(self):
+        self._job = None
+        self.flush()
+
+    @staticmethod
+    def _rows(view, devices):
+        model = view.model
+        for device_index, port_indices in devices.items():
+            if port_indices is None:
+                yield from model.rows_for_device(device_index)
+            else:
+                for port_index in port_indices:
+                    row = model.row_of(device_index, port_index)
+                    if row is not None:
+                        yield row
@@ -0,0 +1,143 @@
+# search.py
+
+from collections import defaultdict
+
+# Length of the n-grams stored in the index; shorter queries fall back to a scan
+NGRAM = 3
+
+
+def searchable_text(device):
+    # Lower-cased name, type and distinct port connections, one field per line
+    return joined_text(device.name, device.type, device.ports.connection_targets())
+
+
+def joined_text(name, device_type, connection_targets):
+    return "\n".join([name, device_type, *connection_targets]).lower()
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class SearchIndex:
+    # Trigram inverted index over device name, type and port connected_to values.
+    # Devices are keyed by their position in the inventory's devices list.
+    def __init__(self):
+        self._postings = defaultdict(set)  # n-gram -> device ids containing it
+        self._texts = {}                   # device id -> searchable text
+        self.generation = 0                # Bumped on every change, so cached results can be invalidated
+
+    def __len__(self):
+        return len(self._texts)
+
+    def rebuild(self, devices):
+        self._postings.clear()
+        self._texts.clear()
+        for device_id, device in enumerate(devices):
+            self._add(device_id, device)
+        self.generation += 1
+
+    def adopt(self, other):
+        # Take over an index built elsewhere (e.g. on a worker thread) in one step
+        self._postings = other._postings
+        self._texts = other._texts
+        self.generation += 1
+
+    def add(self, device_id, device):
+        self._add(device_id, device)
+        self.generation += 1
+
+    def extend(self, first_id, devices):
+        # Index devices with consecutive ids from first_id as one change
+        for device_id, device in enumerate(devices, start=first_id):
+            self._add(device_id, device)
+        if devices:
+            self.generation += 1
+
+    def rebuild_from_texts(self, texts):
+        # Build from (device_id, text) pairs, e.g. straight from a SQLiteStore query
+        self._postings.clear()
+        self._texts.clear()
+        for device_id, text in texts:
+            self._add_text(device_id, text)
+        self.generation += 1
+
+    def update(self, device_id, device):
+        # Re-index a device after its name or port connections changed
+        text = searchable_text(device)
+        old_text = self._texts.get(device_id)
+        if text == old_text:
+            return
+        if old_text is not None:
+            self._discard(device_id, ngrams(old_text) - ngrams(text))
+        self._texts[device_id] = text
+        for gram in ngrams(text):
+            self._postings[gram].add(device_id)
+        self.generation += 1
+
+    def search(self, term):
+        # Return the sorted ids of devices whose text contains the term
+        term = term.lower()
+        if len(term) < NGRAM:
+            return sorted(device_id for device_id, text in self._texts.items() if term in text)
+
+        # Intersect the posting lists, smallest first, then confirm the substring match
+        postings = sorted((self._postings.get(gram, ()) for gram in ngrams(term)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return self.refine(sorted(candidates), term)
+
+    def refine(self, device_ids, term):
+        # Narrow an earlier (sorted) result list to the devices that also match the term
+        term = term.lower()
+        texts = self._texts
+        return [device_id for device_id in device_ids if term in texts[device_id]]
+
+    def _add(self, device_id, device):
+        self._add_text(device_id, searchable_text(device))
+
+    def _add_text(self, device_id, text):
+        self._texts[device_id] = text
+        for gram in ngrams(text):
+            self._postings[gram].add(device_id)
+
+    def _discard(self, device_id, grams):
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(device_id)
+                if not posting:
+                    del self._postings[gram]
+
+
+class SearchSession:
+    # Incremental querying for a search box: while the user keeps extending the
+    # term, only the previous hits are re-checked instead of querying the index.
+    def __init__(self, index):
+        self.index = index
+        self._last_term = None
+        self._last_result = None
+        self._generation = None
+
+    def search(self, term):
+        term = term.lower()
+        if (
+            self._last_term is not None
+            and self._generation == self.index.generation
+            and self._last_term in term
+        ):
+            result = self.index.refine(self._last_result, term)
+        else:
+            result = self.index.search(term)
+
+        self._last_term = term
+        self._last_result = result
+        self._generation = self.index.generation
+        return result
+
+    def reset(self):
+        self._last_term = None
+        self._last_result = None
@@ -0,0 +1,414 @@
+# shards.py
+#
+# Sharded inventories for multi-rack, multi-site campuses. Devices are grouped
+# site -> rack, and each group is stored as its own JSON shard next to a
+# manifest:
+#
+#     campus.manifest.json
+#     campus.shards/S01/S01-R001.1.json
+#
+# The manifest lists every shard in inventory order with each device's name,
+# type, port count, site and rack and every connected port. That is enough to
+# build the search index, the connection graph, the site/rack tree and the
+# table layout without opening a shard. A shard's file is placed by the site
+# and rack its devices had when it was first written; devices moved since keep
+# their shard and only their manifest row changes. Shards are read when one of their devices is first accessed. Once more
+# than LOADED_PORT_BUDGET ports are held, unchanged shards are evicted least
+# recently used first.
+#
+# A rack may span several shards: devices added later go into new shards at
+# the end, so device positions (and everything indexed by them) never move.
+
+import bisect
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from models import InternTable, UNASSIGNED, location
+from persistence import load_devices, save_devices, set_new_file_mode
+from search import joined_text
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 2
+# Ports held in loaded shards before unchanged ones are evicted
+LOADED_PORT_BUDGET = 200_000
+
+
+def is_sharded_path(path):
+    return path.lower().endswith(MANIFEST_SUFFIX)
+
+
+def shard_directory(manifest_path):
+    return manifest_path[:-len(MANIFEST_SUFFIX)] + ".shards"
+
+
+def read_manifest(path):
+    with open(path, encoding="utf-8") as file:
+        manifest = json.load(file)
+    if manifest.get("version") == 1:
+        _upgrade_manifest(manifest)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path}: unsupported manifest version {manifest.get('version')!r}")
+    return manifest
+
+
+def _upgrade_manifest(manifest):
+    # Version 1 filed devices by name only, with racks named "SITE-RACK" and
+    # site-level devices in a rack named after the site; give each device row
+    # the site and rack its shard was filed under
+    for entry in manifest["shards"]:
+        site, rack = entry["site"], entry["rack"]
+        if rack == site or rack == UNASSIGNED:
+            rack = None
+        elif rack.startswith(f"{site}-"):
+            rack = rack[len(site) + 1:]
+        if site == UNASSIGNED:
+            site = None
+        for row in entry["devices"]:
+            row.extend((site, rack))
+    manifest["version"] = MANIFEST_VERSION
+
+
+def write_manifest(path, manifest):
+    # Atomic like persistence.save_devices: temporary file, fsync, rename
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        set_new_file_mode(temp_path, path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def write_shards(path, devices, progress=None, total=None):
+    # Write devices (any iterable) as a new sharded inventory at manifest path.
+    # Consecutive devices in the same rack share a shard.
+    total = (total if total is not None else len(devices)) or 1
+    manifest = {"version": MANIFEST_VERSION, "next_serial": 1, "shards": []}
+    old_files = _shard_files(path) if os.path.exists(path) else set()
+    written = 0
+    for rack, run in _rack_runs(devices):
+        manifest["shards"].append(_write_shard(path, manifest, rack, run))
+        written += len(run)
+        if progress is not None:
+            progress(written / total)
+    write_manifest(path, manifest)
+    _remove_files(path, old_files - {entry["file"] for entry in manifest["shards"]})
+    return manifest
+
+
+def device_states(devices):
+    # Copies of each device's fields and port columns, to tell later whether it
+    # changed; interned ids are stable, so ids compare
+    return [
+        (device.name, device.type, device.site, device.rack, device.ports.flags[:], device.ports.targets[:])
+        for device in devices
+    ]
+
+
+def _rack_runs(devices):
+    # (site, rack), [devices] for each run of consecutive devices in one rack
+    rack, run = None, []
+    for device in devices:
+        device_rack = location(device)
+        if device_rack != rack and run:
+            yield rack, run
+            run = []
+        rack = device_rack
+        run.append(device)
+    if run:
+        yield rack, run
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w.-]", "_", name) or "_"
+
+
+def _write_shard(path, manifest, rack, devices):
+    # Write devices to a new shard file and return its manifest entry
+    site, rack_name = rack
+    serial = manifest["next_serial"]
+    manifest["next_serial"] = serial + 1
+    relative = f"{_safe_name(site)}/{_safe_name(rack_name)}.{serial}.json"
+    full_path = os.path.join(shard_directory(path), relative)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    save_devices(full_path, devices, compact=True)
+    return _shard_entry(site, rack_name, relative, devices)
+
+
+def _shard_entry(site, rack, relative, devices):
+    links = []
+    for offset, device in enumerate(devices):
+        ports = device.ports
+        for port_index, target_id in enumerate(ports.targets):
+            if target_id:
+                links.append([offset, port_index, ports.strings.lookup(target_id)])
+    return {
+        "site": site,
+        "rack": rack,
+        "file": relative,
+        "devices": [[device.name, device.type, len(device.ports), device.site, device.rack] for device in devices],
+        "links": links,
+    }
+
+
+def _shard_files(path):
+    try:
+        return {entry["file"] for entry in read_manifest(path)["shards"]}
+    except (OSError, ValueError):
+        return set()
+
+
+def _remove_files(path, relatives):
+    for relative in relatives:
+        full_path = os.path.join(shard_directory(path), relative)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+
+class ShardedDeviceList:
+    # List-like view of a sharded inventory, in the manner of LazyDeviceList.
+    # preload, if given, is the full device list just written to path; it is
+    # adopted as already loaded instead of being read back. preload_states,
+    # from device_states() taken before the write, says what was written;
+    # without it the devices are taken to be unchanged since. Loaded shards
+    # intern their connections into strings (the inventory's table).
+    def __init__(self, path, budget=LOADED_PORT_BUDGET, preload=None, preload_states=None, strings=None):
+        self.path = path
+        self.budget = budget
+        self.strings = strings if strings is not None else InternTable()
+        self.manifest = read_manifest(path)
+        self._lock = threading.RLock()  # Shards are loaded from the Tk thread and saved from workers
+        self._loaded = OrderedDict()    # Shard number -> devices, least recently used first
+        self._snapshots = {}            # Shard number -> per-device state as last loaded or saved
+        self._loaded_ports = 0
+        self._appended = []
+        self._index_shards()
+
+        if preload is not None:
+            for shard in range(len(self._entries)):
+                start, end = self._offsets[shard], self._offsets[shard + 1]
+                self._hold(shard, list(preload[start:end]))
+                if preload_states is not None:
+                    self._snapshots[shard] = preload_states[start:end]
+            self._appended = list(preload[self._stored:])
+            for device in self._appended:
+                self._port_counts.append(len(device.ports))
+            self._evict()
+
+    def _index_shards(self):
+        self._entries = self.manifest["shards"]
+        self._offsets = [0]
+        self._port_counts = []
+        for entry in self._entries:
+            self._offsets.append(self._offsets[-1] + len(entry["devices"]))
+            self._port_counts.extend(row[2] for row in entry["devices"])
+        self._stored = self._offsets[-1]
+
+    def __len__(self):
+        return self._stored + len(self._appended)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index >= self._stored:
+            return self._appended[index - self._stored]
+        shard = bisect.bisect_right(self._offsets, index) - 1
+        return self.shard(shard)[index - self._offsets[shard]]
+
+    def __iter__(self):
+        # Shards not already held are read without being kept, so a full pass
+        # (export, save as JSON) does not pin the whole campus in memory. Each
+        # gets its own InternTable, as this may run on a worker.
+        for shard in range(len(self._entries)):
+            devices = self._loaded.get(shard)
+            yield from devices if devices is not None else self._read(shard)
+        yield from self._appended
+
+    def append(self, device):
+        self._appended.append(device)
+        self._port_counts.append(len(device.ports))
+
+    def port_count(self, index):
+        # Known for every device without loading it
+        return self._port_counts[index]
+
+    def shard(self, shard):
+        # Devices of one shard, loading it if needed
+        devices = self._loaded.get(shard)
+        if devices is not None:
+            try:
+                self._loaded.move_to_end(shard)
+            except KeyError:
+                pass  # Evicted by a save on a worker just now; the devices are still valid
+            return devices
+        with self._lock:
+            devices = self._loaded.get(shard)
+            if devices is not None:
+                return devices
+            devices = self._read(shard, self.strings)
+            self._hold(shard, devices)
+            self._evict()
+            return devices
+
+    def loaded_shards(self):
+        return list(self._loaded)
+
+    def loaded(self):
+        # (position, device) for every device held in memory, as LazyDeviceList.loaded()
+        for shard, devices in list(self._loaded.items()):
+            for offset, device in enumerate(devices, start=self._offsets[shard]):
+                yield offset, device
+        for offset, device in enumerate(self._appended, start=self._stored):
+            yield offset, device
+
+    # Manifest queries; none of these open a shard
+
+    def hierarchy(self):
+        # [(site, [(rack, [device indices])])] in inventory order, from the
+        # manifest rows, or the devices themselves where they are held
+        locations = []
+        for shard, entry in enumerate(self._entries):
+            devices = self._loaded.get(shard)
+            if devices is not None:
+                locations.extend(location(device) for device in devices)
+            else:
+                locations.extend((site or UNASSIGNED, rack or UNASSIGNED) for _, _, _, site, rack in entry["devices"])
+        locations.extend(location(device) for device in self._appended)
+        sites = {}
+        for device_index, (site, rack) in enumerate(locations):
+            sites.setdefault(site, {}).setdefault(rack, []).append(device_index)
+        return [(site, list(racks.items())) for site, racks in sites.items()]
+
+    def search_texts(self):
+        # (position, searchable text) per device, for SearchIndex.rebuild_from_texts
+        for shard, entry in enumerate(self._entries):
+            targets = [set() for _ in entry["devices"]]
+            for offset, _, connected_to in entry["links"]:
+                targets[offset].add(connected_to)
+            start = self._offsets[shard]
+            for offset, (name, device_type, *_) in enumerate(entry["devices"]):
+                yield start + offset, joined_text(name, device_type, targets[offset])
+
+    def device_types(self):
+        # (name, type) for every stored device
+        for entry in self._entries:
+            for name, device_type, *_ in entry["devices"]:
+                yield name, device_type
+
+    def iter_connections(self):
+        # (device name, port index, connected_to) for every connected port
+        for entry in self._entries:
+            devices = entry["devices"]
+            for offset, port_index, connected_to in entry["links"]:
+                yield devices[offset][0], port_index, connected_to
+
+    # Saving
+
+    def save(self, progress=None):
+        # Rewrite only the shards that changed, add shards for new devices, then
+        # swap in the new manifest. Returns the number of shards written.
+        # _lock is held only to pick the shards and to swap in the result, so
+        # the UI can keep loading shards while they are written.
+        with self._lock:
+            changed = [(shard, self._loaded[shard]) for shard in list(self._loaded) if self._changed(shard)]
+            # Taken before writing, so edits made meanwhile still count as unsaved
+            snapshots = {shard: self._snapshot(devices) for shard, devices in changed}
+            appended = self._appended[:]  # Devices added while this runs wait for the next save
+            # Shards are written against a copy of the manifest; nothing here
+            # changes until the new manifest is on disk, so a cancelled or
+            # failed save can simply be run again
+            manifest = dict(self.manifest, shards=self._entries[:])
+        appended_runs = list(_rack_runs(appended))
+        total = (len(changed) + len(appended_runs)) or 1
+        replaced = set()
+        created = set()
+        written = 0
+
+        try:
+            for shard, devices in changed:
+                entry = manifest["shards"][shard]
+                replaced.add(entry["file"])
+                manifest["shards"][shard] = _write_shard(self.path, manifest, (entry["site"], entry["rack"]), devices)
+                created.add(manifest["shards"][shard]["file"])
+                written += 1
+                if progress is not None:
+                    progress(written / total)
+
+            for rack, run in appended_runs:
+                manifest["shards"].append(_write_shard(self.path, manifest, rack, run))
+                created.add(manifest["shards"][-1]["file"])
+                written += 1
+                if progress is not None:
+                    progress(written / total)
+
+            write_manifest(self.path, manifest)
+        except BaseException:
+            _remove_files(self.path, created)
+            raise
+
+        with self._lock:
+            self.manifest = manifest
+            for shard, snapshot in snapshots.items():
+                if shard in self._loaded:
+                    self._snapshots[shard] = snapshot
+
+            # The new devices now live in stored shards, at the same positions
+            first_new, stored_before = len(self._offsets) - 1, self._stored
+            self._index_shards()
+            self._appended = self._appended[len(appended):]
+            self._port_counts.extend(len(device.ports) for device in self._appended)
+            for shard in range(first_new, len(self._entries)):
+                start, end = self._offsets[shard] - stored_before, self._offsets[shard + 1] - stored_before
+                self._hold(shard, appended[start:end])
+            self._evict()
+        _remove_files(self.path, replaced)
+        return written
+
+    # Internals
+
+    def _read(self, shard, strings=None):
+        entry = self._entries[shard]
+        devices = load_devices(os.path.join(shard_directory(self.path), entry["file"]), strings=strings)
+        # The manifest row is authoritative; shards written before version 2 have no location
+        for device, (_, _, _, site, rack) in zip(devices, entry["devices"]):
+            device.site, device.rack = site, rack
+        return devices
+
+    def _hold(self, shard, devices):
+        self._loaded[shard] = devices
+        self._snapshots[shard] = self._snapshot(devices)
+        self._loaded_ports += sum(len(device.ports) for device in devices)
+
+    def _evict(self):
+        # Drop unchanged shards, oldest first, until under budget; changed ones stay until saved
+        if self._loaded_ports <= self.budget:
+            return
+        for shard in list(self._loaded)[:-1]:  # Never the shard just used
+            if self._loaded_ports <= self.budget:
+                break
+            if not self._changed(shard):
+                devices = self._loaded.pop(shard)
+                del self._snapshots[shard]
+                self._loaded_ports -= sum(len(device.ports) for device in devices)
+
+    @staticmethod
+    def _snapshot(devices):
+        return device_states(devices)
+
+    def _changed(self, shard):
+        for device, (name, device_type, site, rack, flags, targets) in zip(self._loaded[shard], self._snapshots[shard]):
+            ports = device.ports
+            if (device.name, device.type, device.site, device.rack) != (name, device_type, site, rack):
+                return True
+            if ports.flags != flags or ports.targets != targets:
+                return True
+        return False
@@ -0,0 +1,404 @@
+# sqlite_store.py
+
+import sqlite3
+import threading
+
+from models import Device, InternTable, UNASSIGNED
+from csv_io import export_csv, iter_import_batches
+from persistence import iter_devices, save_devices
+from search import joined_text
+
+# Devices read per query when the views page through a store
+PAGE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    port_count INTEGER NOT NULL,
+    site TEXT,
+    rack TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_devices_position ON devices(position);
+CREATE INDEX IF NOT EXISTS idx_devices_name ON devices(name);
+
+-- Option flags (models.POE | VLAN | SFP); only ports with a flag set have a row
+CREATE TABLE IF NOT EXISTS ports (
+    device_id INTEGER NOT NULL REFERENCES devices(id) ON DELETE CASCADE,
+    port INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    PRIMARY KEY (device_id, port)
+) WITHOUT ROWID;
+
+-- One row per connected port
+CREATE TABLE IF NOT EXISTS connections (
+    device_id INTEGER NOT NULL REFERENCES devices(id) ON DELETE CASCADE,
+    port INTEGER NOT NULL,
+    connected_to TEXT NOT NULL,
+    PRIMARY KEY (device_id, port)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_connections_connected_to ON connections(connected_to);
+"""
+
+
+class SQLiteStore:
+    # Optional storage backend. Devices, port flags and connections live in
+    # separate indexed tables, and a save only writes the rows that changed
+    # since the device was last loaded or saved.
+    def __init__(self, path):
+        self.path = path
+        # Used from the Tk thread and from TaskScheduler workers; access is serialized by _lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(SCHEMA)
+        # Databases written before devices had a site and rack lack the columns
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(devices)")}
+        for column in ("site", "rack"):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE devices ADD COLUMN {column} TEXT")
+        self._lock = threading.RLock()
+        self._saved = {}  # store_id -> (position, name, type, site, rack, flags, targets) as last written
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM devices")
+        self._saved.clear()
+
+    def count_devices(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+
+    def device_index(self):
+        # (id, port_count) for every device in inventory order, without loading ports
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, port_count FROM devices ORDER BY position"
+            ).fetchall()
+
+    def load_page(self, offset, limit=PAGE_SIZE, track=True, strings=None):
+        # Devices [offset, offset + limit) in inventory order. Positions are kept
+        # dense by save(), so this is an index range scan rather than an OFFSET.
+        # track=False skips change tracking for read-only passes such as exports.
+        # Connections are interned into strings, or a new InternTable for the page.
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, position, name, type, site, rack, port_count FROM devices"
+                " WHERE position >= ? AND position < ? ORDER BY position",
+                (offset, offset + limit),
+            ).fetchall()
+            return self._build_devices(rows, track, strings)
+
+    def load_devices_by_id(self, device_ids):
+        with self._lock:
+            placeholders = ",".join("?" * len(device_ids))
+            rows = self._connection.execute(
+                f"SELECT id, position, name, type, site, rack, port_count FROM devices WHERE id IN ({placeholders})"
+                " ORDER BY position",
+                list(device_ids),
+            ).fetchall()
+            return self._build_devices(rows)
+
+    def iter_devices(self, page_size=PAGE_SIZE):
+        # Read-only pass over every device, one page in memory at a time
+        offset = 0
+        while True:
+            page = self.load_page(offset, page_size, track=False)
+            if not page:
+                return
+            yield from page
+            offset += len(page)
+
+    def load_all(self, progress=None):
+        total = self.count_devices() or 1
+        devices = []
+        for device in self.iter_devices():
+            devices.append(device)
+            if progress is not None and len(devices) % PAGE_SIZE == 0:
+                progress(len(devices) / total)
+        return devices
+
+    def search_texts(self):
+        # (position, searchable text) per device, for SearchIndex.rebuild_from_texts
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT d.position, d.name, d.type, group_concat(c.connected_to, char(10))"
+                " FROM devices d LEFT JOIN connections c ON c.device_id = d.id"
+                " GROUP BY d.id ORDER BY d.position"
+            ).fetchall()
+        return [
+            (position, joined_text(name, device_type, set(targets.split("\n")) if targets else ()))
+            for position, name, device_type, targets in rows
+        ]
+
+    def locations(self):
+        # (position, site, rack) for every device, in inventory order
+        with self._lock:
+            return self._connection.execute("SELECT position, site, rack FROM devices ORDER BY position").fetchall()
+
+    def device_types(self):
+        # (name, type) for every device
+        with self._lock:
+            return self._connection.execute("SELECT name, type FROM devices").fetchall()
+
+    def iter_connections(self):
+        # (device name, port index, connected_to) for every connected port
+        with self._lock:
+            return self._connection.execute(
+                "SELECT d.name, c.port, c.connected_to FROM connections c JOIN devices d ON d.id = c.device_id"
+            ).fetchall()
+
+    def find_by_name(self, name):
+        with self._lock:
+            rows = self._connection.execute("SELECT id FROM devices WHERE name = ?", (name,)).fetchall()
+        return self.load_devices_by_id([row[0] for row in rows]) if rows else []
+
+    def find_connected_to(self, target):
+        # (device name, port number) of every port whose connected_to is target
+        with self._lock:
+            return self._connection.execute(
+                "SELECT d.name, c.port + 1 FROM connections c JOIN devices d ON d.id = c.device_id"
+                " WHERE c.connected_to = ? ORDER BY d.position, c.port",
+                (target,),
+            ).fetchall()
+
+    def save(self, devices, positions=None, progress=None):
+        # Write the given devices, touching only rows that differ from what was
+        # last loaded or saved. positions defaults to each device's list index.
+        # Returns the number of rows written.
+        written = 0
+        total = len(devices) or 1
+        # New ids and snapshots are applied only once the transaction commits,
+        # so a cancelled or failed save leaves the devices and _saved as they were
+        saved = {}  # store_id -> (device, snapshot)
+        with self._lock:
+            with self._connection:
+                cursor = self._connection.cursor()
+                for count, device in enumerate(devices, start=1):
+                    position = positions[count - 1] if positions is not None else count - 1
+                    written += self._save_device(cursor, device, position, saved)
+                    if progress is not None and count % PAGE_SIZE == 0:
+                        progress(count / total)
+            for device_id, (device, snapshot) in saved.items():
+                device.store_id = device_id
+                self._saved[device_id] = snapshot
+        return written
+
+    def import_json(self, path, progress=None):
+        # Replace the store's contents with a JSON inventory file, streamed device by device
+        self.clear()
+        batch = []
+        position = 0
+        for device in iter_devices(path, progress):
+            batch.append(device)
+            if len(batch) == PAGE_SIZE:
+                self.save(batch, range(position, position + len(batch)))
+                position += len(batch)
+                batch = []
+        if batch:
+            self.save(batch, range(position, position + len(batch)))
+        # The imported Device objects are discarded; so is their change tracking
+        self._saved.clear()
+
+    def import_csv(self, path, report=None, progress=None):
+        # Append devices from a CSV in the export layout, one batch per transaction
+        position = self.count_devices()
+        for batch in iter_import_batches(path, report, progress=progress):
+            self.save(batch, range(position, position + len(batch)))
+            position += len(batch)
+        self._saved.clear()
+
+    def export_json(self, path, compact=False, progress=None):
+        save_devices(path, self.iter_devices(), compact=compact, progress=progress, total=self.count_devices())
+
+    def export_csv(self, path, progress=None, device_types=None):
+        export_csv(path, self.iter_devices(), progress=progress, total=self.count_devices(), device_types=device_types)
+
+    def _build_devices(self, rows, track=True, strings=None):
+        if not rows:
+            return []
+        strings = strings if strings is not None else InternTable()
+        devices = {}
+        for device_id, position, name, device_type, site, rack, port_count in rows:
+            device = Device(device_type, name, port_count, site, rack, strings)
+            device.store_id = device_id
+            devices[device_id] = (position, device)
+
+        placeholders = ",".join("?" * len(devices))
+        ids = list(devices)
+        for device_id, port, flags in self._connection.execute(
+            f"SELECT device_id, port, flags FROM ports WHERE device_id IN ({placeholders})", ids
+        ):
+            devices[device_id][1].ports.flags[port] = flags
+        for device_id, port, connected_to in self._connection.execute(
+            f"SELECT device_id, port, connected_to FROM connections WHERE device_id IN ({placeholders})", ids
+        ):
+            devices[device_id][1].ports.set_connected_to(port, connected_to)
+
+        if track:
+            for device_id, (position, device) in devices.items():
+                self._saved[device_id] = self._snapshot(device, position)
+        return [device for position, device in sorted(devices.values(), key=lambda item: item[0])]
+
+    def _snapshot(self, device, position):
+        ports = device.ports
+        # Copies of the port columns; interned target ids are stable, so comparing ids is enough
+        return (position, device.name, device.type, device.site, device.rack, ports.flags[:], ports.targets[:])
+
+    def _save_device(self, cursor, device, position, saved):
+        ports = device.ports
+        snapshot = self._snapshot(device, position)
+        previous = self._saved.get(device.store_id)
+        if previous == snapshot:
+            return 0
+
+        written = 0
+        if previous is None:
+            cursor.execute(
+                "INSERT INTO devices (position, name, type, site, rack, port_count) VALUES (?, ?, ?, ?, ?, ?)",
+                (position, device.name, device.type, device.site, device.rack, len(ports)),
+            )
+            device_id = cursor.lastrowid
+            written += 1
+            changed_ports = range(len(ports))
+            old_flags = None
+            old_targets = None
+        else:
+            if previous[:5] != snapshot[:5]:
+                cursor.execute(
+                    "UPDATE devices SET position = ?, name = ?, type = ?, site = ?, rack = ? WHERE id = ?",
+                    (position, device.name, device.type, device.site, device.rack, device.store_id),
+                )
+                written += 1
+            changed_ports = self._changed_ports(previous, snapshot)
+            old_flags = previous[5]
+            old_targets = previous[6]
+            device_id = device.store_id
+
+        for i in changed_ports:
+            flags = ports.flags[i]
+            if old_flags is None:
+                if flags:
+                    cursor.execute(
+                        "INSERT INTO ports (device_id, port, flags) VALUES (?, ?, ?)", (device_id, i, flags)
+                    )
+                    written += 1
+            elif old_flags[i] != flags:
+                if flags:
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO ports (device_id, port, flags) VALUES (?, ?, ?)",
+                        (device_id, i, flags),
+                    )
+                else:
+                    cursor.execute("DELETE FROM ports WHERE device_id = ? AND port = ?", (device_id, i))
+                written += 1
+
+            connected_to = ports.connected_to(i)
+            if old_targets is None:
+                if connected_to:
+                    cursor.execute(
+                        "INSERT INTO connections (device_id, port, connected_to) VALUES (?, ?, ?)",
+                        (device_id, i, connected_to),
+                    )
+                    written += 1
+            elif old_targets[i] != ports.targets[i]:
+                if connected_to:
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO connections (device_id, port, connected_to) VALUES (?, ?, ?)",
+                        (device_id, i, connected_to),
+                    )
+                else:
+                    cursor.execute("DELETE FROM connections WHERE device_id = ? AND port = ?", (device_id, i))
+                written += 1
+
+        saved[device_id] = (device, snapshot)
+        return written
+
+    def _changed_ports(self, previous, snapshot):
+        # Port indices whose flags or connection id differ between two snapshots
+        old_flags, new_flags = previous[5], snapshot[5]
+        old_targets, new_targets = previous[6], snapshot[6]
+        if old_flags == new_flags and old_targets == new_targets:
+            return []
+        return [
+            i for i in range(len(new_flags))
+            if old_flags[i] != new_flags[i] or old_targets[i] != new_targets[i]
+        ]
+
+
+class LazyDeviceList:
+    # List-like view of a SQLiteStore for the UI. Devices are read a page at a
+    # time on first access and then kept, so in-memory edits are never lost;
+    # devices that were never touched are never loaded. Kept pages intern their
+    # connections into strings (the inventory's table).
+    def __init__(self, store, page_size=PAGE_SIZE, strings=None):
+        self.store = store
+        self.page_size = page_size
+        self.strings = strings if strings is not None else InternTable()
+        index = store.device_index()
+        self._port_counts = [port_count for _, port_count in index]
+        self._stored = len(index)
+        self._pages = {}
+        self._appended = []
+
+    def __len__(self):
+        return self._stored + len(self._appended)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index >= self._stored:
+            return self._appended[index - self._stored]
+        page = index // self.page_size
+        if page not in self._pages:
+            self._pages[page] = self.store.load_page(page * self.page_size, self.page_size, strings=self.strings)
+        return self._pages[page][index % self.page_size]
+
+    def __iter__(self):
+        # Pages not already held are read without being kept, so a full pass
+        # (export, save as JSON) does not pin the whole store in memory. Each
+        # gets its own InternTable, as this may run on a worker.
+        for page in range((self._stored + self.page_size - 1) // self.page_size):
+            devices = self._pages.get(page)
+            if devices is None:
+                devices = self.store.load_page(page * self.page_size, self.page_size, track=False)
+            yield from devices
+        yield from self._appended
+
+    def append(self, device):
+        self._appended.append(device)
+        self._port_counts.append(len(device.ports))
+
+    def port_count(self, index):
+        # Known for every device without loading it
+        return self._port_counts[index]
+
+    def loaded(self):
+        # (position, device) for every device held in memory; the only ones that can have changed
+        for page, devices in self._pages.items():
+            for offset, device in enumerate(devices):
+                yield page * self.page_size + offset, device
+        for offset, device in enumerate(self._appended):
+            yield self._stored + offset, device
+
+    def hierarchy(self):
+        # [(site, [(rack, [device indices])])] from the store's site and rack
+        # columns, with the current fields of every device held in memory
+        locations = [(site, rack) for _, site, rack in self.store.locations()][:self._stored]
+        locations.extend((None, None) for _ in self._appended)
+        for position, device in self.loaded():
+            locations[position] = (device.site, device.rack)
+        sites = {}
+        for device_index, (site, rack) in enumerate(locations):
+            sites.setdefault(site or UNASSIGNED, {}).setdefault(rack or UNASSIGNED, []).append(device_index)
+        return [(site, list(racks.items())) for site, racks in sites.items()]
+
+    def save(self, progress=None):
+        loaded = list(self.loaded())
+        return self.store.save([device for _, device in loaded], [position for position, _ in loaded], progress)
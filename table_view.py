@@ -0,0 +1,216 @@
+# table_view.py
+
+import bisect
+from tkinter import ttk
+
+from models import POE, VLAN
+from profiling import PROFILER
+
+# Fallback row height (pixels) when the ttk theme does not report one
+DEFAULT_ROW_HEIGHT = 20
+
+
+def port_mapping_row(device, port_index):
+    # Row values for the Port Mapping table
+    ports = device.ports
+    return (
+        device.name,
+        f"Port {port_index + 1}",
+        ports.connected_to(port_index) or "",
+        "Yes" if ports.has(port_index, POE) else "No",
+        "Yes" if ports.has(port_index, VLAN) else "No",
+    )
+
+
+def cable_management_row(device, port_index):
+    # Row values for the Cable Management table
+    return (
+        device.name,
+        f"Port {port_index + 1}",
+        device.ports.connected_to(port_index) or "Unconnected",
+    )
+
+
+class PortRowModel:
+    # Flat, read-only view over every port of every device, addressed by row number.
+    # Only a prefix sum of port counts is kept, so locating a row is a bisect and
+    # no per-port objects are created.
+    def __init__(self, get_devices, formatter):
+        self.get_devices = get_devices  # Callable returning the current devices list
+        self.formatter = formatter
+        self.device_filter = None       # Optional list of device indices to show
+        self._device_indices = []
+        self._offsets = [0]
+        self._slot_of_device = {}
+
+    def rebuild(self):
+        # Recompute the row layout after devices were added, removed or filtered
+        devices = self.get_devices()
+        if self.device_filter is None:
+            device_indices = range(len(devices))
+        else:
+            device_indices = [i for i in self.device_filter if i < len(devices)]
+
+        # A LazyDeviceList knows every port count without loading the devices
+        port_count = getattr(devices, "port_count", None)
+        if port_count is None:
+            port_count = lambda device_index: len(devices[device_index].ports)
+
+        offsets = [0]
+        total = 0
+        for device_index in device_indices:
+            total += port_count(device_index)
+            offsets.append(total)
+
+        self._device_indices = list(device_indices)
+        self._offsets = offsets
+        self._slot_of_device = {device_index: slot for slot, device_index in enumerate(self._device_indices)}
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def locate(self, row):
+        # Map a row number to (device_index, port_index)
+        slot = bisect.bisect_right(self._offsets, row) - 1
+        return self._device_indices[slot], row - self._offsets[slot]
+
+    def rows_for_device(self, device_index):
+        # Row numbers covering a device's ports (empty if the device is filtered out)
+        slot = self._slot_of_device.get(device_index)
+        if slot is None:
+            return range(0)
+        return range(self._offsets[slot], self._offsets[slot + 1])
+
+    def row_of(self, device_index, port_index):
+        rows = self.rows_for_device(device_index)
+        if port_index < len(rows):
+            return rows[port_index]
+        return None
+
+    def values(self, row):
+        device_index, port_index = self.locate(row)
+        return self.formatter(self.get_devices()[device_index], port_index)
+
+
+class VirtualTable:
+    # Windowed renderer for a ttk.Treeview: only the rows currently in view exist
+    # as Treeview items. The items form a fixed pool that is re-filled while
+    # scrolling, and an item is only touched when its values actually change.
+    def __init__(self, tree, model, scrollbar=None):
+        self.tree = tree
+        self.model = model
+        self.scrollbar = scrollbar
+        self.first = 0                                  # Row number shown in the top slot
+        self.visible = int(tree.cget("height")) or 10   # Number of pooled items
+        self.selected_row = None
+        self._rendered = {}                             # Pool slot -> values currently shown
+
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+
+        tree.bind("<Configure>", self._on_configure)
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        tree.bind("<Button-5>", lambda e: self.scroll(3))
+        tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def refresh(self):
+        # Structural change (rows added, removed or filtered): rebuild the layout
+        self.model.rebuild()
+        self._clamp()
+        self._render()
+
+    def update_rows(self, rows):
+        # Row-level update: re-render only the given rows that are on screen
+        last = self.first + len(self._rendered)
+        for row in rows:
+            if self.first <= row < last:
+                self._render_slot(row - self.first)
+
+    def update_device(self, device_index):
+        self.update_rows(self.model.rows_for_device(device_index))
+
+    def scroll(self, delta):
+        self.first += delta
+        self._clamp()
+        self._render()
+
+    def yview(self, *args):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", count, "units" | "pages")
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.model))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self._clamp()
+        self._render()
+
+    def row_for_item(self, item):
+        # Translate a pooled Treeview item id back to its row number
+        return self.first + int(item[3:])
+
+    def _clamp(self):
+        self.first = max(0, min(self.first, len(self.model) - self.visible))
+
+    def _render(self):
+        count = min(self.visible, len(self.model) - self.first)
+        pool = self.tree.get_children()
+
+        # The pool was cleared from outside; forget what we think is displayed
+        if len(pool) < len(self._rendered):
+            self._rendered.clear()
+
+        for slot in range(len(pool), count):
+            self.tree.insert("", "end", iid=f"row{slot}")
+        PROFILER.count("treeview.items_created", max(0, count - len(pool)))
+        if len(pool) > count:
+            self.tree.delete(*pool[count:])
+            for slot in range(count, len(pool)):
+                self._rendered.pop(slot, None)
+
+        for slot in range(count):
+            self._render_slot(slot)
+
+        self._sync_selection(count)
+        self._sync_scrollbar()
+
+    def _render_slot(self, slot):
+        values = self.model.values(self.first + slot)
+        if self._rendered.get(slot) != values:
+            self.tree.item(f"row{slot}", values=values)
+            self._rendered[slot] = values
+            PROFILER.count("treeview.items_updated")
+
+    def _sync_selection(self, count):
+        # Keep the selection attached to its row rather than its pool slot
+        row = self.selected_row
+        if row is not None and self.first <= row < self.first + count:
+            self.tree.selection_set(f"row{row - self.first}")
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+    def _sync_scrollbar(self):
+        if self.scrollbar is None:
+            return
+        total = len(self.model)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible) / total))
+
+    def _on_configure(self, event):
+        # Resize the pool to the number of rows that fit in the widget
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT
+        visible = max(1, event.height // int(row_height) - 1)  # Minus the heading row
+        if visible != self.visible:
+            self.visible = visible
+            self._clamp()
+            self._render()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self.selected_row = self.row_for_item(selection[0])
@@ -0,0 +1,132 @@
+# tasks.py
+
+import os
+import queue
+import threading
+
+# How often (ms) the Tk loop collects results from the worker threads
+POLL_MS = 50
+MAX_WORKERS = 4
+
+
+class TaskCancelled(Exception):
+    # Raised inside a worker by Task.report once the task has been cancelled
+    pass
+
+
+class Task:
+    # Handle for one background job. The worker reports progress through it,
+    # and the UI can cancel it.
+    def __init__(self, scheduler, title, on_done, on_error, on_progress, on_cancel):
+        self.scheduler = scheduler
+        self.title = title
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # A job that never started will not report back by itself
+        if self.future is not None and self.future.cancel():
+            self.scheduler._events.put((self, "cancelled", None))
+
+    def report(self, fraction):
+        # Called from the worker; doubles as the cancellation checkpoint
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.title)
+        self.scheduler._events.put((self, "progress", fraction))
+
+
+class TaskScheduler:
+    # Thread pool for file I/O and other long-running work. Callbacks are never
+    # run on a worker: results are queued and handed back to Tk by polling with
+    # root.after, so they may freely touch widgets.
+    def __init__(self, root, max_workers=MAX_WORKERS):
+        self.root = root
+        self.max_workers = max_workers
+        self._executor = None  # Created by the first submit; concurrent.futures is slow to import
+        self._events = queue.Queue()
+        self._active = set()
+        self._file_locks = {}
+        self._file_locks_guard = threading.Lock()
+        self._poll_job = None
+
+    def submit(self, work, title="", on_done=None, on_error=None, on_progress=None, on_cancel=None,
+               write_path=None):
+        # Run work(task) on the pool. Jobs that write the same write_path are
+        # serialized so two saves can never interleave on one file.
+        task = Task(self, title, on_done, on_error, on_progress, on_cancel)
+        lock = self._file_lock(write_path) if write_path else None
+        self._active.add(task)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pyrack")
+        task.future = self._executor.submit(self._run, task, work, lock)
+        if self._poll_job is None:
+            self._poll_job = self.root.after(POLL_MS, self._poll)
+        return task
+
+    def active_tasks(self):
+        return list(self._active)
+
+    def shutdown(self):
+        for task in list(self._active):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _file_lock(self, path):
+        key = os.path.normcase(os.path.abspath(path))
+        with self._file_locks_guard:
+            return self._file_locks.setdefault(key, threading.Lock())
+
+    def _run(self, task, work, lock):
+        try:
+            if lock is None:
+                result = work(task)
+            else:
+                with lock:
+                    if task.cancelled:
+                        raise TaskCancelled(task.title)
+                    result = work(task)
+        except TaskCancelled:
+            self._events.put((task, "cancelled", None))
+        except Exception as error:
+            self._events.put((task, "error", error))
+        else:
+            self._events.put((task, "done", result))
+
+    def _poll(self):
+        # Drain finished work; progress is coalesced to the latest value per task
+        latest_progress = {}
+        while True:
+            try:
+                task, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest_progress[task] = payload
+                continue
+            latest_progress.pop(task, None)
+            if task not in self._active:
+                continue
+            self._active.discard(task)
+            callback = {"done": task.on_done, "error": task.on_error, "cancelled": task.on_cancel}[kind]
+            if callback is not None:
+                callback(payload)
+
+        for task, fraction in latest_progress.items():
+            if task in self._active and task.on_progress is not None:
+                task.on_progress(fraction)
+
+        if self._active:
+            self._poll_job = self.root.after(POLL_MS, self._poll)
+        else:
+            self._poll_job = None
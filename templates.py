@@ -0,0 +1,184 @@
+# templates.py
+#
+# Device templates for provisioning many devices at once. A template has a
+# device type, a port count, a naming pattern and a port profile that sets
+# default options on ranges of ports, e.g.
+#
+#     DeviceTemplate("Access 48", "Switch", 48, "S01-R{n:03d}-SW01", "1-44: PoE VLAN; 45-48: SFP")
+#     template.build(40)  # S01-R001-SW01 ... S01-R040-SW01
+#
+# There is a built-in template for each device type. User templates are
+# kept in ~/.pyrack/templates.json (or $PYRACK_TEMPLATES) and replace
+# built-ins with the same name.
+
+import json
+import os
+import re
+from array import array
+
+from core import DEVICE_TYPES
+from models import Device, InternTable, OPTION_FLAGS
+
+TEMPLATES_VERSION = 1
+
+# "1-24: PoE VLAN" or "48: SFP"; entries are separated by ";" or new lines
+PROFILE_ENTRY = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+))?\s*:\s*(.*?)\s*$")
+
+
+def default_path():
+    return os.environ.get("PYRACK_TEMPLATES") or os.path.join(os.path.expanduser("~"), ".pyrack", "templates.json")
+
+
+def parse_profile(text, port_count):
+    # [(first port index, last port index, flags)] from profile text; later
+    # entries win where ranges overlap. Raises ValueError on bad input.
+    options = {name.lower(): flag for name, flag in OPTION_FLAGS.items()}
+    ranges = []
+    for entry in re.split(r"[;\n]", text or ""):
+        if not entry.strip():
+            continue
+        match = PROFILE_ENTRY.match(entry)
+        if not match:
+            raise ValueError(f"Port profile entry {entry.strip()!r} should look like '1-24: PoE VLAN'")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if not 1 <= first <= last <= port_count:
+            raise ValueError(f"Port range {first}-{last} is outside ports 1-{port_count}")
+        flags = 0
+        for name in match.group(3).replace(",", " ").split():
+            if name.lower() not in options:
+                raise ValueError(f"Unknown port option {name!r}; expected {', '.join(OPTION_FLAGS)}")
+            flags |= options[name.lower()]
+        ranges.append((first - 1, last - 1, flags))
+    return ranges
+
+
+class DeviceTemplate:
+    def __init__(self, name, device_type, port_count=None, pattern=None, profile=""):
+        if device_type not in DEVICE_TYPES:
+            raise ValueError(f"Unknown device type {device_type!r}; expected one of {', '.join(DEVICE_TYPES)}")
+        self.name = name
+        self.device_type = device_type
+        self.port_count = DEVICE_TYPES[device_type] if port_count is None else port_count
+        self.pattern = pattern or f"{device_type} {{n}}"
+        self.profile = profile
+        if not isinstance(self.port_count, int):
+            raise ValueError("Port count must be a whole number.")
+        if self.port_count < 0:
+            raise ValueError("Port count cannot be negative.")
+        self._flags = self.port_flags()  # Also checks the profile
+
+    def __eq__(self, other):
+        return isinstance(other, DeviceTemplate) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "type": self.device_type,
+            "ports": self.port_count,
+            "pattern": self.pattern,
+            "profile": self.profile,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["type"], data.get("ports"), data.get("pattern"), data.get("profile", ""))
+
+    def port_flags(self):
+        # Flags for every port, as one array that each new device copies
+        flags = array("B", bytes(self.port_count))
+        for first, last, value in parse_profile(self.profile, self.port_count):
+            flags[first:last + 1] = array("B", [value]) * (last - first + 1)
+        return flags
+
+    def names(self, count, start=1):
+        # Device names for sequence numbers start .. start + count - 1
+        if count < 1:
+            raise ValueError("Count must be at least 1.")
+        try:
+            names = [self.pattern.format(n=n, type=self.device_type) for n in range(start, start + count)]
+        except (KeyError, IndexError, AttributeError, TypeError, ValueError) as error:
+            raise ValueError(f"Bad naming pattern {self.pattern!r}: use {{n}} (e.g. {{n:02d}}) and {{type}}") from error
+        if len(set(names)) != len(names):
+            raise ValueError(f"Naming pattern {self.pattern!r} gives duplicate names; include {{n}}")
+        if not all(names):
+            raise ValueError("Naming pattern gives an empty name.")
+        return names
+
+    def build(self, count, start=1, site=None, rack=None):
+        # count new devices with this template's ports and options, all in one site and rack
+        devices = []
+        strings = InternTable()
+        for name in self.names(count, start):
+            device = Device(self.device_type, name, site=site, rack=rack, strings=strings)
+            device.ports.flags = self._flags[:]
+            device.ports.targets = array("I", [0]) * self.port_count
+            devices.append(device)
+        return devices
+
+
+BUILTIN_TEMPLATES = [DeviceTemplate(device_type, device_type) for device_type in DEVICE_TYPES]
+
+
+class TemplateLibrary:
+    # The built-in templates plus the user's, by name
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self.templates = {template.name: template for template in BUILTIN_TEMPLATES}
+        if os.path.exists(self.path):
+            for template in self._read():
+                self.templates[template.name] = template
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"{self.path}: {error}") from None
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path}: templates file must contain a JSON object")
+        if data.get("version") != TEMPLATES_VERSION:
+            raise ValueError(f"{self.path}: unsupported templates version {data.get('version')!r}")
+        entries = data.get("templates")
+        if not isinstance(entries, list):
+            raise ValueError(f"{self.path}: \"templates\" must be a list")
+        templates = []
+        for number, entry in enumerate(entries, start=1):
+            if not isinstance(entry, dict):
+                raise ValueError(f"{self.path}: template {number} must be a JSON object")
+            try:
+                template = DeviceTemplate.from_dict(entry)
+                template.names(1)  # Checks the naming pattern
+            except KeyError as error:
+                raise ValueError(f"{self.path}: template {number} is missing {error.args[0]!r}") from None
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"{self.path}: template {number}: {error}") from None
+            templates.append(template)
+        return templates
+
+    def __getitem__(self, name):
+        try:
+            return self.templates[name]
+        except KeyError:
+            raise ValueError(f"No template named {name!r}") from None
+
+    def names(self):
+        return list(self.templates)
+
+    def set(self, template):
+        self.templates[template.name] = template
+
+    def remove(self, name):
+        # Built-ins come back (unchanged) after removing a user template of the same name
+        self.templates.pop(name, None)
+        for template in BUILTIN_TEMPLATES:
+            if template.name == name:
+                self.templates[name] = template
+
+    def save(self):
+        # Only templates that differ from the built-ins are written
+        builtins = {template.name: template for template in BUILTIN_TEMPLATES}
+        user = [template.to_dict() for name, template in self.templates.items() if builtins.get(name) != template]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump({"version": TEMPLATES_VERSION, "templates": user}, file, indent=4)